@@ -4,7 +4,15 @@ from werkzeug.utils import secure_filename  # type: ignore
 from datetime import datetime
 
 # Import Config and Database Connection
-from config import SECRET_KEY, UPLOAD_FOLDER
+from config import SECRET_KEY, UPLOAD_FOLDER, MAX_CONTENT_LENGTH
+from db import init_db_pool, init_sql_instrumentation
+from utils.invalidation import init_invalidation_bus
+from utils.realtime import init_realtime
+from utils.assets import init_assets
+from utils.compression import init_compression
+from utils.fragment_cache import init_fragment_cache
+from utils.attachment_download import block_static_uploads
+from utils.previews import init_previews
 
 # Import Blueprints
 from routes.homepage import homepage_bp
@@ -22,6 +30,34 @@ from routes.member_mainpage import member_mainpage_bp
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+
+# Hand out one pooled DB connection per request and return it on teardown
+init_db_pool(app)
+
+# Count and time SQL statements per request (X-Query-Count / Server-Timing)
+init_sql_instrumentation(app)
+
+# Listen for cache invalidation events published by the other workers
+init_invalidation_bus(app)
+
+# Push task events to open Server-Sent Event streams (same listener thread)
+init_realtime(app)
+
+# Serve fingerprinted CSS/JS (python -m utils.assets build) with immutable caching
+init_assets(app)
+
+# Compress HTML, JSON and static text responses (gzip, or brotli if installed)
+init_compression(app)
+
+# {% cache %} blocks for rendered template fragments keyed by data version
+init_fragment_cache(app)
+
+# Attachments are served by the access-checked download routes only
+app.before_request(block_static_uploads)
+
+# previewable() for the attachment previews in the task views
+init_previews(app)
 
 # Add global date formatting filter before app runs
 @app.template_filter('format_date')
@@ -5,6 +5,19 @@ SECRET_KEY = "supersecretkey"
 
 # Uploads Configuration
 UPLOAD_FOLDER = os.path.join("static", "uploads")
+STATIC_FOLDER = "static"
+ATTACHMENT_STORAGE = os.getenv("ATTACHMENT_STORAGE", os.path.join(UPLOAD_FOLDER, "blobs"))   # content-addressed blobs
+ATTACHMENT_CHUNK_SIZE = 64 * 1024                                                          # bytes read/written at a time
+ORPHAN_BLOB_GRACE = int(os.getenv("ORPHAN_BLOB_GRACE", "3600"))                          # seconds before a blob file without a row is deleted
+# Hand downloads to the front proxy: "" (serve from Flask), "x-accel-redirect" (nginx) or "x-sendfile"
+ATTACHMENT_OFFLOAD = os.getenv("ATTACHMENT_OFFLOAD", "")
+ATTACHMENT_ACCEL_PREFIX = os.getenv("ATTACHMENT_ACCEL_PREFIX", "/protected-static/")      # internal nginx location for the static folder
+
+# Request bodies above MAX_CONTENT_LENGTH are rejected (413); bigger files use the chunked upload API
+MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(16 * 1024 * 1024)))
+ATTACHMENT_MAX_SIZE = int(os.getenv("ATTACHMENT_MAX_SIZE", str(100 * 1024 * 1024)))      # per file, enforced while streaming
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))            # largest chunk per request
+UPLOAD_EXPIRY_HOURS = int(os.getenv("UPLOAD_EXPIRY_HOURS", "24"))                        # unfinished uploads are then deleted
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
 
 # Database Configuration
@@ -13,4 +26,79 @@ DB_CONFIG = {
     "database": os.getenv("DB_NAME", "project_db"),
     "user": os.getenv("DB_USER", "postgres"),
     "password": os.getenv("DB_PASSWORD", "xotour")
-}
\ No newline at end of file
+}
+
+# Connection Pool Configuration (per worker process)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_MAX_AGE = int(os.getenv("DB_POOL_MAX_AGE", "1800"))                       # seconds before a connection is recycled
+DB_POOL_HEALTHCHECK_INTERVAL = int(os.getenv("DB_POOL_HEALTHCHECK_INTERVAL", "30"))  # idle seconds before a ping on checkout
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))                         # seconds to wait for a free connection
+
+# Authenticated user identities cached per worker process
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+
+# SQL Instrumentation (X-Query-Count / Server-Timing headers, slow-query and N+1 warnings)
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "1") == "1"
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+SQL_REPEATED_QUERY_THRESHOLD = int(os.getenv("SQL_REPEATED_QUERY_THRESHOLD", "10"))
+
+# Keyset pagination (?per_page=... is clamped to PAGE_SIZE_MAX)
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "200"))
+
+# Streaming exports: rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Bulk task import: rows accepted per file, per-row errors listed back to the user
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "10000"))
+IMPORT_ERRORS_SHOWN = int(os.getenv("IMPORT_ERRORS_SHOWN", "20"))
+
+# Conditional GET: bump to invalidate every ETag handed out before a deploy that changes templates
+CACHE_VERSION = os.getenv("CACHE_VERSION", "2")
+
+# Team header + roster cache per worker process (entries also expire after TEAM_CACHE_TTL seconds)
+TEAM_CACHE_SIZE = int(os.getenv("TEAM_CACHE_SIZE", "512"))
+TEAM_CACHE_TTL = int(os.getenv("TEAM_CACHE_TTL", "60"))
+
+# Cross-worker cache invalidation over LISTEN/NOTIFY ("0" stops listening for it)
+INVALIDATION_BUS = os.getenv("INVALIDATION_BUS", "1") == "1"
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "pms_invalidate")
+
+# Real-time events (Server-Sent Events) fed by LISTEN/NOTIFY
+SSE_ENABLED = os.getenv("SSE_ENABLED", "1") == "1"
+SSE_CHANNEL = os.getenv("SSE_CHANNEL", "pms_events")
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", "500"))                 # open streams per worker process
+SSE_HEARTBEAT = int(os.getenv("SSE_HEARTBEAT", "15"))                      # seconds between keep-alive comments
+SSE_MAX_STREAM_SECONDS = int(os.getenv("SSE_MAX_STREAM_SECONDS", "300"))   # browsers reconnect after this
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))                   # undelivered events kept per stream
+LIVE_EVENTS_POLL_INTERVAL = int(os.getenv("LIVE_EVENTS_POLL_INTERVAL", "30"))  # seconds; pages poll when streams are not served
+
+# Notifications listed per page / returned per JSON request
+NOTIFICATIONS_PAGE_SIZE = int(os.getenv("NOTIFICATIONS_PAGE_SIZE", "20"))
+NOTIFICATIONS_COMMIT_LAG = int(os.getenv("NOTIFICATIONS_COMMIT_LAG", "60"))   # seconds a ?since= poll looks back
+
+# Response compression (gzip, or brotli when the optional `brotli` package is installed)
+COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))     # bytes; smaller bodies are sent as is
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))             # gzip level; brotli uses quality 5
+
+# Rendered template fragments per worker process ({% cache %} blocks)
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "256"))
+FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", "300"))
+FRAGMENT_MAX_SIZE = int(os.getenv("FRAGMENT_MAX_SIZE", "262144"))          # characters; bigger blocks are not cached
+
+# Attachment previews (images need the optional `Pillow` package, PDFs the `pdftoppm` tool)
+PREVIEW_ENABLED = os.getenv("PREVIEW_ENABLED", "1") == "1"
+PREVIEW_SIZE = int(os.getenv("PREVIEW_SIZE", "240"))                       # pixels; longest side of a preview
+PREVIEW_TIMEOUT = int(os.getenv("PREVIEW_TIMEOUT", "30"))                  # seconds allowed for one PDF render
+
+# Background jobs (python -m utils.job_worker)
+JOB_CHANNEL = os.getenv("JOB_CHANNEL", "pms_jobs")                           # NOTIFY channel that wakes idle workers
+JOB_WORKER_PROCESSES = int(os.getenv("JOB_WORKER_PROCESSES", "2"))
+JOB_POLL_INTERVAL = int(os.getenv("JOB_POLL_INTERVAL", "5"))                 # seconds an idle worker waits before looking again
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE = int(os.getenv("JOB_BACKOFF_BASE", "10"))                  # seconds before the first retry, doubled per attempt
+JOB_BACKOFF_MAX = int(os.getenv("JOB_BACKOFF_MAX", "3600"))
+JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", "600"))                           # running jobs older than this are requeued
+JOB_CLEANUP_INTERVAL = int(os.getenv("JOB_CLEANUP_INTERVAL", "3600"))        # seconds between scheduled cleanup jobs
@@ -0,0 +1,26 @@
+-- ---------------------------------------------
+-- Task indexes for the member pages
+-- ---------------------------------------------
+
+-- member_notifications_and_deadlines: open deadlines of a member
+--   WHERE assigned_to = ? AND due_date IS NOT NULL AND status != 'DONE' ORDER BY due_date
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_open_due
+    ON tasks (assigned_to, due_date)
+    WHERE status <> 'DONE' AND due_date IS NOT NULL;
+
+-- explain: idx_tasks_assigned_open_due
+--   SELECT title, due_date, status, priority FROM tasks
+--   WHERE assigned_to = 1 AND due_date IS NOT NULL AND status != 'DONE'
+--   ORDER BY due_date ASC
+
+-- member_view_tasks: all tasks of a member ordered by deadline.
+-- Also serves every other lookup on assigned_to, so the single-column index goes.
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_due
+    ON tasks (assigned_to, due_date);
+
+DROP INDEX IF EXISTS idx_tasks_assigned_to;
+
+-- explain: idx_tasks_assigned_due
+--   SELECT task_id, title, status FROM tasks
+--   WHERE assigned_to = 1
+--   ORDER BY due_date ASC
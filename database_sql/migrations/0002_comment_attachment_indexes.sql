@@ -0,0 +1,23 @@
+-- ---------------------------------------------
+-- Comment and attachment indexes for the task pages
+-- ---------------------------------------------
+
+-- view_task / member_view_task / notifications: comments of a task, newest first.
+-- Replaces the single-column index on comments(task_id).
+CREATE INDEX IF NOT EXISTS idx_comments_task_created
+    ON comments (task_id, created_at DESC);
+
+DROP INDEX IF EXISTS idx_comments_task_id;
+
+-- explain: idx_comments_task_created
+--   SELECT comment_id, content, created_at FROM comments
+--   WHERE task_id = 1
+--   ORDER BY created_at DESC
+
+-- view_task / member_view_task: attachments of a task grouped by comment
+CREATE INDEX IF NOT EXISTS idx_attachments_task_comment
+    ON attachments (task_id, comment_id);
+
+-- explain: idx_attachments_task_comment
+--   SELECT attachment_id, file_name, file_path, comment_id FROM attachments
+--   WHERE task_id = 1
@@ -0,0 +1,11 @@
+-- ---------------------------------------------
+-- Teams led by a team leader
+-- ---------------------------------------------
+
+-- teamLeader_manage_teams / teamLeader_manage_tasks_projects: WHERE leader_id = ?
+CREATE INDEX IF NOT EXISTS idx_teams_leader_id
+    ON teams (leader_id);
+
+-- explain: idx_teams_leader_id
+--   SELECT team_id, name, description FROM teams
+--   WHERE leader_id = 1
@@ -0,0 +1,59 @@
+-- ---------------------------------------------
+-- Denormalized member count on teams
+-- ---------------------------------------------
+-- teamLeader_manage_teams and member_teams_included read teams.member_count
+-- instead of joining and grouping team_members on every page view.
+
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS member_count integer NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION team_members_count_row() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE teams SET member_count = member_count + 1 WHERE team_id = NEW.team_id;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE teams SET member_count = member_count - 1 WHERE team_id = OLD.team_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION team_members_count_truncate() RETURNS trigger AS $$
+BEGIN
+    UPDATE teams SET member_count = 0 WHERE member_count <> 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS team_members_count_row ON team_members;
+CREATE TRIGGER team_members_count_row
+    AFTER INSERT OR DELETE OR UPDATE OF team_id ON team_members
+    FOR EACH ROW EXECUTE FUNCTION team_members_count_row();
+
+DROP TRIGGER IF EXISTS team_members_count_truncate ON team_members;
+CREATE TRIGGER team_members_count_truncate
+    AFTER TRUNCATE ON team_members
+    FOR EACH STATEMENT EXECUTE FUNCTION team_members_count_truncate();
+
+-- Recomputes every count from team_members; returns the number of teams corrected.
+-- Used for the backfill below and by `python -m utils.maintenance repair-member-counts`.
+CREATE OR REPLACE FUNCTION repair_team_member_counts() RETURNS integer AS $$
+DECLARE
+    fixed integer;
+BEGIN
+    LOCK TABLE team_members IN SHARE MODE;
+    UPDATE teams t
+    SET member_count = c.actual
+    FROM (
+        SELECT t2.team_id, COUNT(m.user_id)::integer AS actual
+        FROM teams t2
+        LEFT JOIN team_members m ON m.team_id = t2.team_id
+        GROUP BY t2.team_id
+    ) c
+    WHERE c.team_id = t.team_id AND t.member_count <> c.actual;
+    GET DIAGNOSTICS fixed = ROW_COUNT;
+    RETURN fixed;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT repair_team_member_counts();
@@ -0,0 +1,41 @@
+-- ---------------------------------------------
+-- Keyset pagination sort keys
+-- ---------------------------------------------
+-- Keyset pages compare (sort_key, id) row values, so the sort keys must be NOT NULL
+-- and backed by an index in the same order.
+
+UPDATE tasks SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE tasks ALTER COLUMN created_at SET NOT NULL;
+
+UPDATE teams SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE teams ALTER COLUMN created_at SET NOT NULL;
+
+-- admin_show_tasks_and_projects: all tasks, newest first
+CREATE INDEX IF NOT EXISTS idx_tasks_created_id
+    ON tasks (created_at DESC, task_id DESC);
+
+-- explain: idx_tasks_created_id
+--   SELECT task_id, title FROM tasks
+--   WHERE (created_at, task_id) < ('2030-01-01', 100)
+--   ORDER BY created_at DESC, task_id DESC LIMIT 51
+
+-- admin_show_tasks_and_projects / admin_manage_teams: all teams, newest first
+CREATE INDEX IF NOT EXISTS idx_teams_created_id
+    ON teams (created_at DESC, team_id DESC);
+
+-- explain: idx_teams_created_id
+--   SELECT team_id, name FROM teams
+--   WHERE (created_at, team_id) < ('2030-01-01', 100)
+--   ORDER BY created_at DESC, team_id DESC LIMIT 51
+
+-- member_view_tasks: tasks of a member by deadline (no deadline last), then id.
+-- Supersedes idx_tasks_assigned_due from 0001.
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_due_id
+    ON tasks (assigned_to, (COALESCE(due_date, 'infinity'::date)), task_id);
+
+DROP INDEX IF EXISTS idx_tasks_assigned_due;
+
+-- explain: idx_tasks_assigned_due_id
+--   SELECT task_id, title FROM tasks
+--   WHERE assigned_to = 1 AND (COALESCE(due_date, 'infinity'::date), task_id) > ('2025-01-01', 1)
+--   ORDER BY COALESCE(due_date, 'infinity'::date) ASC, task_id ASC LIMIT 51
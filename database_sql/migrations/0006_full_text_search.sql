@@ -0,0 +1,31 @@
+-- ---------------------------------------------
+-- Full-text search over tasks and comments
+-- ---------------------------------------------
+-- Stored generated tsvectors are kept in sync by PostgreSQL on every
+-- INSERT/UPDATE, and GIN indexes answer '@@' lookups without scanning
+-- the tables, so search cost follows the number of matches, not table size.
+
+ALTER TABLE tasks
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_tasks_search_vector
+    ON tasks USING gin (search_vector);
+
+-- explain: idx_tasks_search_vector
+--   SELECT task_id FROM tasks
+--   WHERE search_vector @@ websearch_to_tsquery('english', 'login authentication')
+
+ALTER TABLE comments
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_comments_search_vector
+    ON comments USING gin (search_vector);
+
+-- explain: idx_comments_search_vector
+--   SELECT comment_id, task_id FROM comments
+--   WHERE search_vector @@ websearch_to_tsquery('english', 'working')
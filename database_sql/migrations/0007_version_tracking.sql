@@ -0,0 +1,79 @@
+-- ---------------------------------------------
+-- Version tracking for conditional GET
+-- ---------------------------------------------
+-- tasks and teams carry a version counter and an updated_at maintained by
+-- triggers, so task and team pages can answer If-None-Match /
+-- If-Modified-Since with a primary-key lookup (see utils/conditional.py).
+--   * any UPDATE of a task or team bumps its version and updated_at
+--   * inserting, editing or deleting a comment or attachment bumps its task
+--   * membership changes bump the team (through the member_count trigger of 0004)
+--   * renaming a user or changing its email, role or status bumps the teams it
+--     leads or belongs to, since team pages list those columns
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version bigint NOT NULL DEFAULT 1;
+UPDATE tasks SET updated_at = created_at WHERE updated_at IS NULL;
+ALTER TABLE tasks ALTER COLUMN updated_at SET NOT NULL;
+
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS version bigint NOT NULL DEFAULT 1;
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS updated_at timestamp without time zone;
+UPDATE teams SET updated_at = created_at WHERE updated_at IS NULL;
+ALTER TABLE teams ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE teams ALTER COLUMN updated_at SET NOT NULL;
+
+CREATE OR REPLACE FUNCTION touch_row_version() RETURNS trigger AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_touch_version ON tasks;
+CREATE TRIGGER tasks_touch_version
+    BEFORE UPDATE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION touch_row_version();
+
+DROP TRIGGER IF EXISTS teams_touch_version ON teams;
+CREATE TRIGGER teams_touch_version
+    BEFORE UPDATE ON teams
+    FOR EACH ROW EXECUTE FUNCTION touch_row_version();
+
+-- Comments and attachments: bump the task they belong to (both tasks when moved)
+CREATE OR REPLACE FUNCTION bump_task_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE tasks SET version = version + 1 WHERE task_id = NEW.task_id;
+    END IF;
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.task_id IS DISTINCT FROM NEW.task_id) THEN
+        UPDATE tasks SET version = version + 1 WHERE task_id = OLD.task_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS comments_bump_task_version ON comments;
+CREATE TRIGGER comments_bump_task_version
+    AFTER INSERT OR UPDATE OR DELETE ON comments
+    FOR EACH ROW EXECUTE FUNCTION bump_task_version();
+
+DROP TRIGGER IF EXISTS attachments_bump_task_version ON attachments;
+CREATE TRIGGER attachments_bump_task_version
+    AFTER INSERT OR UPDATE OR DELETE ON attachments
+    FOR EACH ROW EXECUTE FUNCTION bump_task_version();
+
+-- Users: bump every team page that shows the changed columns
+CREATE OR REPLACE FUNCTION bump_user_team_versions() RETURNS trigger AS $$
+BEGIN
+    UPDATE teams SET version = version + 1
+    WHERE leader_id = NEW.user_id
+       OR team_id IN (SELECT team_id FROM team_members WHERE user_id = NEW.user_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_bump_team_versions ON users;
+CREATE TRIGGER users_bump_team_versions
+    AFTER UPDATE OF username, email, role, status ON users
+    FOR EACH ROW
+    WHEN ((OLD.username, OLD.email, OLD.role, OLD.status) IS DISTINCT FROM (NEW.username, NEW.email, NEW.role, NEW.status))
+    EXECUTE FUNCTION bump_user_team_versions();
@@ -0,0 +1,98 @@
+-- ---------------------------------------------
+-- Fan-out-on-write notifications with read cursors
+-- ---------------------------------------------
+-- Comments, assignments and status changes write one notifications row per
+-- recipient (see utils/notifications.py), so the notifications page reads a
+-- user's newest rows by index instead of joining comments -> tasks -> users.
+-- notification_cursors keeps, per user, the last notification seen and the
+-- number of newer (unread) ones, maintained by triggers.
+
+CREATE TABLE IF NOT EXISTS notifications (
+    notification_id bigserial PRIMARY KEY,
+    user_id integer NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    kind varchar(20) NOT NULL CHECK (kind IN ('comment', 'assignment', 'status')),
+    task_id integer NOT NULL REFERENCES tasks(task_id) ON DELETE CASCADE,
+    comment_id integer REFERENCES comments(comment_id) ON DELETE CASCADE,
+    actor_id integer REFERENCES users(user_id) ON DELETE SET NULL,
+    status varchar(20),
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS notification_cursors (
+    user_id integer PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+    last_seen_id bigint NOT NULL DEFAULT 0,
+    unread_count integer NOT NULL DEFAULT 0
+);
+
+-- Newest notifications of a user, and "since cursor" fetches (notification_id > n)
+CREATE INDEX IF NOT EXISTS idx_notifications_user_id
+    ON notifications (user_id, notification_id DESC);
+
+-- explain: idx_notifications_user_id
+--   SELECT notification_id, kind, task_id FROM notifications
+--   WHERE user_id = 1 AND notification_id > 10
+--   ORDER BY notification_id DESC LIMIT 20
+
+-- Cascades from tasks and comments
+CREATE INDEX IF NOT EXISTS idx_notifications_task_id ON notifications (task_id);
+CREATE INDEX IF NOT EXISTS idx_notifications_comment_id ON notifications (comment_id)
+    WHERE comment_id IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION notifications_unread_row() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO notification_cursors (user_id, unread_count)
+        VALUES (NEW.user_id, 1)
+        ON CONFLICT (user_id) DO UPDATE
+            SET unread_count = notification_cursors.unread_count + 1;
+    ELSE
+        UPDATE notification_cursors
+        SET unread_count = unread_count - 1
+        WHERE user_id = OLD.user_id AND last_seen_id < OLD.notification_id AND unread_count > 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notifications_unread_row ON notifications;
+CREATE TRIGGER notifications_unread_row
+    AFTER INSERT OR DELETE ON notifications
+    FOR EACH ROW EXECUTE FUNCTION notifications_unread_row();
+
+-- Recomputes every unread count from the cursors; returns the number of users corrected.
+-- Used by `python -m utils.maintenance repair-unread-counts`.
+CREATE OR REPLACE FUNCTION repair_notification_unread_counts() RETURNS integer AS $$
+DECLARE
+    fixed integer;
+BEGIN
+    LOCK TABLE notifications IN SHARE MODE;
+    UPDATE notification_cursors c
+    SET unread_count = u.actual
+    FROM (
+        SELECT c2.user_id, COUNT(n.notification_id)::integer AS actual
+        FROM notification_cursors c2
+        LEFT JOIN notifications n
+            ON n.user_id = c2.user_id AND n.notification_id > c2.last_seen_id
+        GROUP BY c2.user_id
+    ) u
+    WHERE u.user_id = c.user_id AND c.unread_count <> u.actual;
+    GET DIAGNOSTICS fixed = ROW_COUNT;
+    RETURN fixed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill: the comments the old page listed (on the member's tasks, by someone
+-- else), oldest first, already marked as seen
+INSERT INTO notifications (user_id, kind, task_id, comment_id, actor_id, status, created_at)
+SELECT t.assigned_to, 'comment', c.task_id, c.comment_id, c.author_id, t.status, c.created_at
+FROM comments c
+JOIN tasks t ON t.task_id = c.task_id
+WHERE t.assigned_to IS NOT NULL
+  AND c.author_id IS DISTINCT FROM t.assigned_to
+  AND NOT EXISTS (SELECT 1 FROM notifications n WHERE n.comment_id = c.comment_id)
+ORDER BY c.created_at, c.comment_id;
+
+UPDATE notification_cursors c
+SET last_seen_id = m.max_id, unread_count = 0
+FROM (SELECT user_id, MAX(notification_id) AS max_id FROM notifications GROUP BY user_id) m
+WHERE m.user_id = c.user_id;
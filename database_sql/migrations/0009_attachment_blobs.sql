@@ -0,0 +1,44 @@
+-- ---------------------------------------------
+-- Content-addressed attachment storage
+-- ---------------------------------------------
+-- Uploaded files are stored once per content under their SHA-256
+-- (see utils/attachment_store.py). attachment_blobs has one row per stored
+-- file with the number of attachments that reference it, kept by a trigger;
+-- blobs whose count drops to zero are removed by
+-- `python -m utils.maintenance gc-attachment-blobs`.
+-- Attachments uploaded before this migration keep content_hash NULL until
+-- `python -m utils.maintenance store-legacy-attachments` moves them into the store.
+
+CREATE TABLE IF NOT EXISTS attachment_blobs (
+    sha256 char(64) PRIMARY KEY,
+    size_bytes bigint NOT NULL,
+    content_type varchar(100) NOT NULL,
+    ref_count integer NOT NULL DEFAULT 0,
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE attachments ADD COLUMN IF NOT EXISTS content_hash char(64) REFERENCES attachment_blobs(sha256);
+ALTER TABLE attachments ADD COLUMN IF NOT EXISTS size_bytes bigint;
+ALTER TABLE attachments ADD COLUMN IF NOT EXISTS content_type varchar(100);
+
+-- Reference lookups and the garbage collector
+CREATE INDEX IF NOT EXISTS idx_attachments_content_hash ON attachments (content_hash);
+CREATE INDEX IF NOT EXISTS idx_attachment_blobs_unreferenced ON attachment_blobs (sha256)
+    WHERE ref_count = 0;
+
+CREATE OR REPLACE FUNCTION attachment_blob_refs_row() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.content_hash IS NOT NULL THEN
+        UPDATE attachment_blobs SET ref_count = ref_count + 1 WHERE sha256 = NEW.content_hash;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') AND OLD.content_hash IS NOT NULL THEN
+        UPDATE attachment_blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.content_hash;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS attachment_blob_refs_row ON attachments;
+CREATE TRIGGER attachment_blob_refs_row
+    AFTER INSERT OR DELETE OR UPDATE OF content_hash ON attachments
+    FOR EACH ROW EXECUTE FUNCTION attachment_blob_refs_row();
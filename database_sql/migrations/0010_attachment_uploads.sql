@@ -0,0 +1,23 @@
+-- ---------------------------------------------
+-- Chunked, resumable attachment uploads
+-- ---------------------------------------------
+-- One row per upload in progress (see utils/chunked_upload.py). `received` is
+-- the number of bytes durably appended to the staging file; a client that
+-- lost its connection asks for it and resumes from there. Finished uploads
+-- are deleted when their file moves into the blob store, and abandoned ones by
+-- `python -m utils.maintenance expire-uploads`.
+
+CREATE TABLE IF NOT EXISTS attachment_uploads (
+    upload_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id integer NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    task_id integer NOT NULL REFERENCES tasks(task_id) ON DELETE CASCADE,
+    file_name varchar(255) NOT NULL,
+    content_type varchar(100) NOT NULL,
+    total_size bigint NOT NULL CHECK (total_size > 0),
+    received bigint NOT NULL DEFAULT 0 CHECK (received BETWEEN 0 AND total_size),
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- expire-uploads: abandoned uploads, oldest activity first
+CREATE INDEX IF NOT EXISTS idx_attachment_uploads_updated ON attachment_uploads (updated_at);
@@ -0,0 +1,45 @@
+-- ---------------------------------------------
+-- Background job queue
+-- ---------------------------------------------
+-- Work that does not have to finish inside a request (see utils/jobs.py).
+-- Jobs are inserted on the request's transaction, so they exist only if its
+-- changes commit, and claimed by `python -m utils.job_worker` processes with
+-- FOR UPDATE SKIP LOCKED. Finished jobs are deleted; a job that keeps failing
+-- stays as 'failed' with its last error.
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id bigserial PRIMARY KEY,
+    kind varchar(50) NOT NULL,
+    payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+    priority smallint NOT NULL DEFAULT 0,
+    status varchar(10) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'failed')),
+    attempts integer NOT NULL DEFAULT 0,
+    max_attempts integer NOT NULL DEFAULT 5 CHECK (max_attempts > 0),
+    dedupe_key varchar(200),
+    run_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_at timestamp without time zone,
+    locked_by varchar(100),
+    last_error text,
+    created_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- claim_job: the next due job, highest priority first
+--   WHERE status = 'queued' AND run_at <= NOW() ORDER BY priority DESC, run_at, job_id
+CREATE INDEX IF NOT EXISTS idx_jobs_claim
+    ON jobs (priority DESC, run_at, job_id)
+    WHERE status = 'queued';
+
+-- explain: idx_jobs_claim
+--   SELECT job_id FROM jobs
+--   WHERE status = 'queued' AND run_at <= NOW()
+--   ORDER BY priority DESC, run_at, job_id LIMIT 1
+
+-- requeue_stale_jobs: running jobs whose worker went away
+CREATE INDEX IF NOT EXISTS idx_jobs_running
+    ON jobs (locked_at)
+    WHERE status = 'running';
+
+-- enqueue(dedupe_key=...): at most one waiting or running job per key
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe
+    ON jobs (dedupe_key)
+    WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'running');
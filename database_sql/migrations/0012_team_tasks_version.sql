@@ -0,0 +1,37 @@
+-- ---------------------------------------------
+-- Per-team version of the team's tasks
+-- ---------------------------------------------
+-- The task tables of the team pages are cached under the versions of their
+-- rows (utils/fragment_cache.py). Instead of hashing the version of every
+-- task on each page view, teams.tasks_version is bumped whenever a task of
+-- the team is inserted, changed (including its comments and attachments,
+-- through the task triggers of 0007), moved or deleted, so the cache key is a
+-- primary-key lookup.
+
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS tasks_version bigint NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION bump_team_tasks_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE teams SET tasks_version = tasks_version + 1 WHERE team_id = NEW.team_id;
+    END IF;
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.team_id IS DISTINCT FROM NEW.team_id) THEN
+        UPDATE teams SET tasks_version = tasks_version + 1 WHERE team_id = OLD.team_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_bump_team_tasks_version ON tasks;
+CREATE TRIGGER tasks_bump_team_tasks_version
+    AFTER INSERT OR UPDATE OR DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION bump_team_tasks_version();
+
+-- A task change is not a change of the team row itself: teams.version (team
+-- header and roster) only moves when another column changes
+DROP TRIGGER IF EXISTS teams_touch_version ON teams;
+CREATE TRIGGER teams_touch_version
+    BEFORE UPDATE ON teams
+    FOR EACH ROW
+    WHEN (OLD.tasks_version IS NOT DISTINCT FROM NEW.tasks_version)
+    EXECUTE FUNCTION touch_row_version();
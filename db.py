@@ -1,19 +1,339 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
 import psycopg2
+from psycopg2 import extensions, sql
 from psycopg2.extras import RealDictCursor
-from config import DB_CONFIG
+from psycopg2.pool import PoolError
+from flask import g, has_app_context, has_request_context, request  # type: ignore
+from config import (
+    DB_CONFIG,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MAX_AGE,
+    DB_POOL_HEALTHCHECK_INTERVAL,
+    DB_POOL_TIMEOUT,
+    SQL_INSTRUMENTATION,
+    SQL_SLOW_QUERY_MS,
+    SQL_REPEATED_QUERY_THRESHOLD,
+)
+
+sql_logger = logging.getLogger("pms.sql")
+
+
+# ---------------------------------------------
+# --- SQL Instrumentation ---
+# ---------------------------------------------
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(query):
+    """Normalizes a statement so executions that differ only in literals group together."""
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", errors="replace")
+    return _WHITESPACE_RE.sub(" ", _LITERAL_RE.sub("?", query)).strip()
+
+
+class QueryStats:
+    """Statements executed while handling one request."""
+
+    def __init__(self):
+        self.queries = []               # (fingerprint, duration_ms, rowcount)
+        self.total_ms = 0.0
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def record(self, query_fingerprint, duration_ms, rowcount):
+        self.queries.append((query_fingerprint, duration_ms, rowcount))
+        self.total_ms += duration_ms
+
+    def repeated(self, threshold):
+        """Returns (fingerprint, executions) for statements run more than `threshold` times."""
+        counts = {}
+        for query_fingerprint, _, _ in self.queries:
+            counts[query_fingerprint] = counts.get(query_fingerprint, 0) + 1
+        return [(fp, n) for fp, n in counts.items() if n > threshold]
+
+
+def _record_query(cursor, query, duration_ms):
+    if isinstance(query, sql.Composable):
+        query = query.as_string(cursor.connection)
+    query_fingerprint = fingerprint(query)
+
+    if duration_ms >= SQL_SLOW_QUERY_MS:
+        sql_logger.warning("slow query (%.1f ms, %s rows): %s", duration_ms, cursor.rowcount, query_fingerprint)
+
+    if has_request_context() and "sql_stats" in g:
+        g.sql_stats.record(query_fingerprint, duration_ms, cursor.rowcount)
+
+
+class InstrumentedCursorMixin:
+    """Times every statement run through a cursor and records it for the current request."""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _record_query(self, query, (time.perf_counter() - start) * 1000)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _record_query(self, query, (time.perf_counter() - start) * 1000)
+
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            _record_query(self, sql, (time.perf_counter() - start) * 1000)
+
+
+_instrumented_cursor_classes = {}
+
+
+def instrumented_cursor_class(cursor_factory):
+    """Returns (and caches) an instrumented subclass of the given cursor class."""
+    cls = _instrumented_cursor_classes.get(cursor_factory)
+    if cls is None:
+        cls = type("Instrumented" + cursor_factory.__name__, (InstrumentedCursorMixin, cursor_factory), {})
+        _instrumented_cursor_classes[cursor_factory] = cls
+    return cls
+
+
+# ---------------------------------------------
+# --- Connection Pool ---
+# ---------------------------------------------
+def connect():
+    """Opens a new, unpooled connection (used by the pool and by long-lived listeners)."""
+    return psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["database"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"]
+    )
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of PostgreSQL connections owned by a single worker process.
+    Idle connections are pinged before reuse and recycled once they exceed max_age.
+    """
+
+    def __init__(self, min_size, max_size, max_age, healthcheck_interval, timeout):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_age = max_age
+        self.healthcheck_interval = healthcheck_interval
+        self.timeout = timeout
+        self.pid = os.getpid()
+
+        self._idle = deque()            # (connection, last_used)
+        self._created_at = {}           # id(connection) -> creation time
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        conn = connect()
+        self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
 
-def get_db_connection():
+    def _expired(self, conn):
+        created_at = self._created_at.get(id(conn), 0)
+        return time.monotonic() - created_at > self.max_age
+
+    def _is_healthy(self, conn, last_used):
+        """Checks that an idle connection is still open, young enough and answering."""
+        if conn.closed or self._expired(conn):
+            return False
+        if time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        """Borrows a connection, waiting up to `timeout` seconds for a free slot."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError("connection pool exhausted")
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    return self._connect()
+                conn, last_used = entry
+                if self._is_healthy(conn, last_used):
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        """Returns a borrowed connection, rolling back any open transaction."""
+        try:
+            if conn.closed or self._expired(conn):
+                self._discard(conn)
+                return
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._discard(conn)
+                return
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        except Exception:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        """Closes every idle connection held by the pool."""
+        with self._lock:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the pool of the current worker process, creating it on first use.
+    A pool inherited through fork() is abandoned (not closed) so the parent's
+    sockets are left untouched.
+    """
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = ConnectionPool(
+                    DB_POOL_MIN_SIZE,
+                    DB_POOL_MAX_SIZE,
+                    DB_POOL_MAX_AGE,
+                    DB_POOL_HEALTHCHECK_INTERVAL,
+                    DB_POOL_TIMEOUT,
+                )
+    return _pool
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled psycopg2 connection.
+    Inside a Flask request close() is a no-op and the connection goes back to
+    the pool on teardown; outside a request close() returns it immediately.
+    """
+
+    def __init__(self, pool, conn, request_scoped):
+        self._pool = pool
+        self._conn = conn
+        self._request_scoped = request_scoped
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        if SQL_INSTRUMENTATION:
+            cursor_factory = kwargs.get("cursor_factory") or self._conn.cursor_factory or extensions.cursor
+            kwargs["cursor_factory"] = instrumented_cursor_class(cursor_factory)
+        return self._conn.cursor(*args, **kwargs)
+
+    def close(self):
+        if not self._request_scoped:
+            self.release()
+
+    def release(self):
+        if self._conn is not None:
+            self._pool.putconn(self._conn)
+            self._conn = None
+
+
+def get_db_connection(dedicated=False):
     """
     Establishes a connection to the PostgreSQL database.
     Returns a connection object or a string with the error message.
+    During a request the same pooled connection is shared through flask.g;
+    dedicated=True borrows a separate one that the caller must close (e.g. a
+    streamed response that outlives the request's teardown).
     """
     try:
-        conn = psycopg2.connect(
-            host=DB_CONFIG["host"],
-            database=DB_CONFIG["database"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"]
-        )
-        return conn
+        if has_app_context() and not dedicated:
+            if "db_conn" not in g:
+                pool = get_pool()
+                g.db_conn = PooledConnection(pool, pool.getconn(), request_scoped=True)
+            return g.db_conn
+
+        pool = get_pool()
+        return PooledConnection(pool, pool.getconn(), request_scoped=False)
     except Exception as e:
         return str(e)
+
+
+def release_db_connection(exc=None):
+    """Returns the request's connection to the pool (teardown handler)."""
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        conn.release()
+
+
+def init_db_pool(app):
+    """Registers the per-request connection teardown on the Flask app."""
+    app.teardown_appcontext(release_db_connection)
+
+
+def start_query_stats():
+    """Starts collecting statement statistics for the current request."""
+    g.sql_stats = QueryStats()
+
+
+def report_query_stats(response):
+    """Adds X-Query-Count / Server-Timing headers and warns about repeated statements."""
+    stats = g.pop("sql_stats", None)
+    if stats is None:
+        return response
+
+    response.headers["X-Query-Count"] = str(stats.count)
+    response.headers.add("Server-Timing", f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"')
+
+    for query_fingerprint, executions in stats.repeated(SQL_REPEATED_QUERY_THRESHOLD):
+        sql_logger.warning(
+            "possible N+1 on %s %s: %d executions of %s",
+            request.method, request.path, executions, query_fingerprint
+        )
+    return response
+
+
+def init_sql_instrumentation(app):
+    """Registers the per-request statement statistics hooks on the Flask app."""
+    if SQL_INSTRUMENTATION:
+        app.before_request(start_query_stats)
+        app.after_request(report_query_stats)
@@ -0,0 +1,23 @@
+"""
+Gunicorn settings for the web service.
+
+    gunicorn -c gunicorn.conf.py backend_server_app:app
+
+gevent workers serve requests as greenlets, so an open event stream
+(utils/realtime.py) waits without holding a thread: one worker keeps up to
+SSE_MAX_CLIENTS streams open next to normal requests. psycopg2 is made
+cooperative too, so a slow query only parks the greenlet that runs it.
+"""
+
+import os
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_WORKERS", "2"))
+worker_class = "gevent"
+worker_connections = int(os.getenv("WEB_WORKER_CONNECTIONS", "1000"))    # concurrent requests + streams per worker
+
+
+def post_fork(server, worker):
+    # Before the app (and its connection pool) is loaded in the worker
+    from psycogreen.gevent import patch_psycopg  # type: ignore
+    patch_psycopg()
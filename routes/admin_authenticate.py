@@ -5,6 +5,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session  # type: ignore
 from psycopg2.extras import RealDictCursor  # type: ignore
 from db import get_db_connection
+from utils.auth_context import remember_user
 
 admin_authenticate_bp = Blueprint("admin_authenticate_bp", __name__)
 
@@ -63,7 +64,7 @@ def admin_login():
         cur = conn.cursor(cursor_factory=RealDictCursor)
         try:
             cur.execute("""
-                SELECT user_id, username, email, password, status
+                SELECT user_id, username, email, password, role, status
                 FROM users
                 WHERE email = %s AND role = 'ADMIN';
             """, (email,))
@@ -85,6 +86,7 @@ def admin_login():
             session["admin_id"] = admin["user_id"]
             session["admin_email"] = admin["email"]
             session["admin_username"] = admin["username"]
+            remember_user(admin)
 
             flash("✅ Admin login successful!", "success")
             return redirect("/admin-mainpage")
@@ -1,33 +1,57 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify  # type: ignore
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, g  # type: ignore
 from psycopg2.extras import RealDictCursor  # type: ignore
 from db import get_db_connection
 from config import ALLOWED_EXTENSIONS
 from utils.file_utils import allowed_file
+from utils.auth_context import current_user_loader, forget_user, auth_cache_stats
+from utils.pagination import page_args, keyset_paginate
+from utils.export import EXPORT_DATASETS, EXPORT_FORMATS, export_response
+from utils.team_cache import load_team, forget_team, user_team_ids, team_cache_stats
+from utils.invalidation import publish
+from utils.realtime import realtime_stats
+from utils.fragment_cache import fragment_cache_stats
+from utils.jobs import job_stats
 
 admin_mainpage_bp = Blueprint("admin_mainpage_bp", __name__)
+admin_mainpage_bp.before_request(current_user_loader("admin"))
 
-# ---------------------------------------------
-# --- Admin Dashboard / Main Page ---
-# ---------------------------------------------
-@admin_mainpage_bp.route("/admin-mainpage")
-def admin_mainpage():
-    if "admin_email" not in session:
+
+@admin_mainpage_bp.before_request
+def require_admin():
+    """Every route here needs an admin session: pages redirect to the login, changes get a 401."""
+    if g.current_user is not None:
+        return None
+    if request.method in ("GET", "HEAD"):
         flash("Please log in first.", "error")
         return redirect("/admin-login")
+    return jsonify({"error": "Please log in first."}), 401
 
-    admin_email = session["admin_email"]
 
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT username, email FROM users WHERE email = %s;", (admin_email,))
-    admin = cur.fetchone()
-    conn.close()
+# Member usernames listed per team on the Manage Teams page (the rest are counted)
+TEAM_MEMBERS_PREVIEW = 20
 
-    if not admin:
-        flash("Admin not found in database.", "error")
-        return redirect("/admin-login")
 
-    return render_template("admin_mainpage.html", admin=admin)
+def publish_user_change(cur, user_ids):
+    """Publishes invalidation events for changed users and the teams listing them; returns those team ids."""
+    team_ids = user_team_ids(cur, user_ids)
+    publish(cur, "user", user_ids)
+    publish(cur, "team", team_ids)
+    return team_ids
+
+
+def forget_user_change(user_ids, team_ids):
+    """Evicts this worker's cached copies right after the change is committed."""
+    for user_id in user_ids:
+        forget_user(user_id)
+    for team_id in team_ids:
+        forget_team(team_id)
+
+# ---------------------------------------------
+# --- Admin Dashboard / Main Page ---
+# ---------------------------------------------
+@admin_mainpage_bp.route("/admin-mainpage")
+def admin_mainpage():
+    return render_template("admin_mainpage.html", admin=g.current_user)
 
 
 # ---------------------------------------------
@@ -35,11 +59,13 @@ def admin_mainpage():
 # ---------------------------------------------
 @admin_mainpage_bp.route("/admin-manageUsers")
 def admin_manage_users():
-    """Displays all users with signup and activation (update) dates."""
+    """Displays users (one keyset page, ordered by username) with signup and activation (update) dates."""
+    page_size, after = page_args()
+
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    cur.execute("""
+    page = keyset_paginate(cur, """
         SELECT 
             username,
             email,
@@ -48,14 +74,13 @@ def admin_manage_users():
             TO_CHAR(created_at, 'DD/MM/YY HH24:MI') AS signup_date,
             TO_CHAR(updated_at, 'DD/MM/YY HH24:MI') AS activated_date
         FROM users
-        ORDER BY username;
-    """)
+        WHERE {keyset}
+    """, (), [("username", "username")], page_size, after)
 
-    users = cur.fetchall()
     cur.close()
     conn.close()
 
-    return render_template("admin_manageUsers.html", users=users)
+    return render_template("admin_manageUsers.html", users=page.items, page=page)
 
 
 # ---------------------------------------------
@@ -90,29 +115,43 @@ def admin_manage_teams():
 
         cur.execute("""
             INSERT INTO teams (name, description, leader_id, created_at)
-            VALUES (%s, %s, %s, NOW());
+            VALUES (%s, %s, %s, NOW())
+            RETURNING team_id;
         """, (team_name, description, leader_id))
+        team_id = cur.fetchone()["team_id"]
+        publish(cur, "team", [team_id])
         conn.commit()
+        forget_team(team_id)
         flash("Team created successfully!", "success")
         return redirect(url_for("admin_mainpage_bp.admin_manage_teams"))
 
-    cur.execute("""
-    SELECT 
-        t.team_id,
-        t.name,
-        t.description,
-        u.username AS leader,
-        COALESCE(STRING_AGG(m.username, ', '), 'No members') AS members
-    FROM teams t
-    LEFT JOIN users u ON t.leader_id = u.user_id
-    LEFT JOIN team_members tm ON t.team_id = tm.team_id
-    LEFT JOIN users m ON tm.user_id = m.user_id
-    GROUP BY t.team_id, t.name, t.description, u.username, t.created_at
-    ORDER BY t.created_at DESC;
-    """)
-    teams = cur.fetchall()
+    # One row per team (newest first, keyset-paged); members come back as an array
+    # capped at TEAM_MEMBERS_PREVIEW, with the full count from teams.member_count
+    page_size, after = page_args()
+    page = keyset_paginate(cur, """
+        SELECT 
+            t.team_id,
+            t.name,
+            t.description,
+            t.created_at,
+            t.member_count,
+            u.username AS leader,
+            ARRAY(
+                SELECT m.username
+                FROM team_members tm
+                JOIN users m ON tm.user_id = m.user_id
+                WHERE tm.team_id = t.team_id
+                ORDER BY m.username
+                LIMIT %s
+            ) AS members
+        FROM teams t
+        LEFT JOIN users u ON t.leader_id = u.user_id
+        WHERE {keyset}
+    """, (TEAM_MEMBERS_PREVIEW,), [("t.created_at", "created_at"), ("t.team_id", "team_id")],
+        page_size, after, descending=True)
+    cur.close()
     conn.close()
-    return render_template("admin_manageTeams.html", teams=teams)
+    return render_template("admin_manageTeams.html", teams=page.items, page=page)
 
 
 # ---------------------------------------------
@@ -128,9 +167,13 @@ def activate_user(username):
             UPDATE users
             SET status = 'ACTIVE',
                 updated_at = NOW()
-            WHERE username = %s;
+            WHERE username = %s
+            RETURNING user_id;
         """, (username,))
+        user_ids = [row["user_id"] for row in cur.fetchall()]
+        team_ids = publish_user_change(cur, user_ids)
         conn.commit()
+        forget_user_change(user_ids, team_ids)
         return jsonify({"message": f"User {username} activated successfully!"}), 200
     except Exception as e:
         conn.rollback()
@@ -147,8 +190,11 @@ def deactivate_user(username):
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     try:
-        cur.execute("UPDATE users SET status = 'INACTIVE' WHERE username = %s;", (username,))
+        cur.execute("UPDATE users SET status = 'INACTIVE' WHERE username = %s RETURNING user_id;", (username,))
+        user_ids = [row["user_id"] for row in cur.fetchall()]
+        team_ids = publish_user_change(cur, user_ids)
         conn.commit()
+        forget_user_change(user_ids, team_ids)
         return jsonify({"message": f"User {username} deactivated."}), 200
     except Exception as e:
         conn.rollback()
@@ -158,51 +204,61 @@ def deactivate_user(username):
         conn.close()
 
 
+@admin_mainpage_bp.route("/change_role/<string:username>", methods=["POST"])
+def change_role(username):
+    """Change the role of a user account."""
+    new_role = ((request.get_json(silent=True) or {}).get("role") or "").strip().upper()
+    if new_role not in ("ADMIN", "TEAM_LEADER", "MEMBER"):
+        return jsonify({"error": "Role must be ADMIN, TEAM_LEADER or MEMBER."}), 400
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("UPDATE users SET role = %s WHERE username = %s RETURNING user_id;", (new_role, username))
+        user_ids = [row["user_id"] for row in cur.fetchall()]
+        if not user_ids:
+            conn.rollback()
+            return jsonify({"error": f"User {username} not found."}), 404
+        team_ids = publish_user_change(cur, user_ids)
+        conn.commit()
+        forget_user_change(user_ids, team_ids)
+        return jsonify({"message": f"User {username} is now {new_role}."}), 200
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+
 # ---------------------------------------------
 # --- View Single Team Details ---
 # ---------------------------------------------
 @admin_mainpage_bp.route("/admin-viewTeam/<int:team_id>")
 def admin_view_team(team_id):
+    # Team header and roster come from the per-worker team cache
     conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-
-    cur.execute("""
-        SELECT 
-            t.team_id,
-            t.name,
-            t.description,
-            u.username AS leader
-        FROM teams t
-        LEFT JOIN users u ON t.leader_id = u.user_id
-        WHERE t.team_id = %s;
-    """, (team_id,))
-    team = cur.fetchone()
-
-    cur.execute("""
-        SELECT u.username, u.email, u.role, u.status
-        FROM team_members tm
-        JOIN users u ON tm.user_id = u.user_id
-        WHERE tm.team_id = %s;
-    """, (team_id,))
-    members = cur.fetchall()
-
-    cur.close()
+    cached = load_team(conn, team_id)
     conn.close()
 
-    if not team:
+    if not cached:
         flash("Team not found.", "error")
         return redirect(url_for("admin_mainpage_bp.admin_manage_teams"))
 
-    return render_template("admin_viewTeam.html", team=team, members=members)
+    return render_template("admin_viewTeam.html", team=cached["team"], members=cached["members"])
 
 
 @admin_mainpage_bp.route("/admin-show_tasks_and_projects")
 def admin_show_tasks_and_projects():
+    # Projects and tasks are paged independently (?projects_after=... / ?after=...)
+    page_size, tasks_after = page_args()
+    _, projects_after = page_args("projects_after")
+
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Get all projects (teams)
-    cur.execute("""
+    # Projects (teams), newest first
+    projects_page = keyset_paginate(cur, """
         SELECT 
             t.team_id,
             t.name AS team_name,
@@ -211,12 +267,12 @@ def admin_show_tasks_and_projects():
             u.username AS leader_name
         FROM teams t
         LEFT JOIN users u ON t.leader_id = u.user_id
-        ORDER BY t.created_at DESC;
-    """)
-    projects = cur.fetchall()
+        WHERE {keyset}
+    """, (), [("t.created_at", "created_at"), ("t.team_id", "team_id")],
+        page_size, projects_after, descending=True, cursor_arg="projects_after")
 
-    # Get all tasks including the leader who assigned them
-    cur.execute("""
+    # Tasks including the leader who assigned them, newest first
+    tasks_page = keyset_paginate(cur, """
         SELECT 
             ta.task_id,
             ta.title,
@@ -232,17 +288,56 @@ def admin_show_tasks_and_projects():
         LEFT JOIN users assignee ON ta.assigned_to = assignee.user_id
         LEFT JOIN users leader ON ta.created_by = leader.user_id
         LEFT JOIN teams tm ON ta.team_id = tm.team_id
-        ORDER BY ta.created_at DESC;
-    """)
-    tasks = cur.fetchall()
+        WHERE {keyset}
+    """, (), [("ta.created_at", "created_at"), ("ta.task_id", "task_id")],
+        page_size, tasks_after, descending=True)
 
     cur.close()
     conn.close()
 
     return render_template(
         "admin_show_tasks_and_projects.html",
-        projects=projects,
-        tasks=tasks
+        projects=projects_page.items,
+        tasks=tasks_page.items,
+        projects_page=projects_page,
+        tasks_page=tasks_page
     )
 
 
+# ---------------------------------------------
+# --- Export Tasks / Comments / Attachments ---
+# ---------------------------------------------
+@admin_mainpage_bp.route("/admin-export/<string:dataset>")
+def admin_export(dataset):
+    fmt = request.args.get("format", "csv")
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        return jsonify({"error": "Unknown export dataset or format."}), 404
+
+    # Whole instance by default, a single team with ?team_id=...
+    team_id = request.args.get("team_id", type=int)
+    team_ids = [team_id] if team_id is not None else None
+    prefix = f"team{team_id}" if team_id is not None else "all"
+    return export_response(dataset, fmt, prefix, team_ids)
+
+
+# ---------------------------------------------
+# --- Cache Statistics (this worker process) ---
+# ---------------------------------------------
+@admin_mainpage_bp.route("/admin-cacheStats")
+def admin_cache_stats():
+    return jsonify({"auth": auth_cache_stats(), "teams": team_cache_stats(), "events": realtime_stats(),
+                    "fragments": fragment_cache_stats()}), 200
+
+
+# ---------------------------------------------
+# --- Background Job Queue Statistics ---
+# ---------------------------------------------
+@admin_mainpage_bp.route("/admin-jobStats")
+def admin_job_stats():
+    """Queued, running and failed jobs, and how long the oldest due job has waited."""
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    stats = job_stats(cur)
+    cur.close()
+    conn.close()
+    return jsonify(stats), 200
@@ -5,6 +5,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session  # type: ignore
 from psycopg2.extras import RealDictCursor  # type: ignore
 from db import get_db_connection
+from utils.auth_context import remember_user
 
 member_authenticate_bp = Blueprint("member_authenticate_bp", __name__)
 
@@ -71,7 +72,7 @@ def member_login():
         try:
             # Select user_id instead of id
             cur.execute("""
-                SELECT user_id, username, email, password, status
+                SELECT user_id, username, email, password, role, status
                 FROM users
                 WHERE email = %s AND role = 'MEMBER';
             """, (email,))
@@ -93,6 +94,7 @@ def member_login():
             session["member_id"] = member["user_id"]
             session["member_email"] = member["email"]
             session["member_username"] = member["username"]
+            remember_user(member)
 
             flash("Member login successful!", "success")
             return redirect(url_for("member_mainpage_bp.member_mainpage"))
@@ -1,37 +1,51 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session  # type: ignore
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, g  # type: ignore
 from psycopg2.extras import RealDictCursor  # type: ignore
-from db import get_db_connection
+from db import get_db_connection, release_db_connection
+from utils.auth_context import current_user_loader
+from utils.task_detail import load_task_detail
+from utils.pagination import page_args, keyset_paginate
+from utils.search import search_tasks
+from utils.task_batch import BatchUpdateError, parse_batch_request, batch_update_tasks
+from utils.team_cache import load_team
+from utils.realtime import event_stream_response
+from utils.attachment_download import load_attachment, send_attachment
+from utils.previews import send_preview, queue_preview
+from utils.notifications import (
+    record_task_event, queue_task_event, notification_cursor, fetch_notifications, mark_notifications_seen, notifications_json
+)
+from utils.conditional import (
+    TASK_VERSION_QUERY, TEAM_VERSION_QUERY, ASSIGNED_TASKS_VERSION_QUERY, page_version, with_validators
+)
+
+from utils.attachment_store import AttachmentTooLarge, stage_upload, store_attachment, guess_content_type
+from utils.chunked_upload import (
+    UploadError, parse_upload_id, parse_task_id, create_upload, upload_status, receive_chunk, append_chunk,
+    finish_upload, abort_upload,
+)
 
 from werkzeug.utils import secure_filename
-from config import UPLOAD_FOLDER, ALLOWED_EXTENSIONS
-import os
+from config import ALLOWED_EXTENSIONS, ATTACHMENT_MAX_SIZE, UPLOAD_CHUNK_SIZE
+from datetime import date
 
 member_mainpage_bp = Blueprint("member_mainpage_bp", __name__)
+member_mainpage_bp.before_request(current_user_loader("member"))
 
 # ---------------------------------------------
 # Member Dashboard / Main Page ---
 # ---------------------------------------------
 @member_mainpage_bp.route("/member-mainpage")
 def member_mainpage():
-    if "member_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/member-login")
 
-    member_email = session["member_email"]
-
-    # Fetch username and email from DB
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT username, email FROM users WHERE email = %s;", (member_email,))
-    member = cur.fetchone()
+    unread = notification_cursor(cur, g.current_user["user_id"])["unread_count"]
     cur.close()
     conn.close()
 
-    if not member:
-        flash("Member not found in database.", "error")
-        return redirect("/member-login")
-
-    return render_template("member_mainpage.html", member=member)
+    return render_template("member_mainpage.html", member=g.current_user, unread=unread)
 
 
 # ---------------------------------------------
@@ -39,40 +53,30 @@ def member_mainpage():
 # ---------------------------------------------
 @member_mainpage_bp.route("/member-teamsIncluded")
 def member_teams_included():
-    if "member_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/member-login")
 
-    member_email = session["member_email"]
+    member = g.current_user
+    member_id = member["user_id"]
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Get the member's user_id
-    cur.execute("SELECT user_id, username FROM users WHERE email = %s;", (member_email,))
-    member = cur.fetchone()
-    if not member:
-        flash("Member not found.", "error")
-        conn.close()
-        return redirect("/member-login")
-
-    member_id = member["user_id"]
-
     # Get all teams where this member participates
+    # (member_count is maintained by triggers on team_members)
     cur.execute("""
         SELECT 
             t.team_id,
             t.name AS team_name,
             t.description,
             u.username AS leader_name,
-            COUNT(tm2.user_id) AS member_count
+            t.member_count
         FROM teams t
         LEFT JOIN users u ON t.leader_id = u.user_id
-        LEFT JOIN team_members tm2 ON t.team_id = tm2.team_id
         WHERE t.team_id IN (
             SELECT team_id FROM team_members WHERE user_id = %s
         )
-        GROUP BY t.team_id, t.name, t.description, u.username
         ORDER BY t.name;
     """, (member_id,))
     teams = cur.fetchall()
@@ -88,39 +92,32 @@ def member_teams_included():
 # ---------------------------------------------
 @member_mainpage_bp.route("/member-viewTeam/<int:team_id>")
 def member_view_team(team_id):
-    if "member_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/member-login")
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Fetch team details
-    cur.execute("""
-        SELECT t.name AS team_name, t.description, u.username AS leader_name
-        FROM teams t
-        LEFT JOIN users u ON t.leader_id = u.user_id
-        WHERE t.team_id = %s;
-    """, (team_id,))
-    team = cur.fetchone()
-
-    # Fetch members
-    cur.execute("""
-        SELECT u.username, u.email, u.role, u.status
-        FROM team_members tm
-        JOIN users u ON tm.user_id = u.user_id
-        WHERE tm.team_id = %s;
-    """, (team_id,))
-    members = cur.fetchall()
+    # Answer a conditional request before loading the team
+    version = page_version(cur, "member_view_team", TEAM_VERSION_QUERY, (team_id,))
+    not_modified = version.not_modified() if version else None
+    if not_modified:
+        cur.close()
+        conn.close()
+        return not_modified
 
     cur.close()
+
+    # Team header and roster come from the per-worker team cache
+    cached = load_team(conn, team_id)
     conn.close()
 
-    if not team:
+    if not cached:
         flash("Team not found.", "error")
         return redirect(url_for("member_mainpage_bp.member_teams_included"))
 
-    return render_template("member_viewTeam.html", team=team, members=members)
+    return with_validators(version, render_template("member_viewTeam.html", team=cached["team"], members=cached["members"]))
 
 
 # ---------------------------------------------
@@ -128,27 +125,19 @@ def member_view_team(team_id):
 # ---------------------------------------------
 @member_mainpage_bp.route("/member-tasks")
 def member_view_tasks():
-    if "member_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/member-login")
 
-    member_email = session["member_email"]
+    member = g.current_user
+    user_id = member["user_id"]
+    page_size, after = page_args()
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Get member user_id
-    cur.execute("SELECT user_id, username FROM users WHERE email = %s;", (member_email,))
-    member = cur.fetchone()
-    if not member:
-        flash("Member not found.", "error")
-        conn.close()
-        return redirect("/member-login")
-
-    user_id = member["user_id"]
-
-    # Get all tasks assigned to this member (with leader name)
-    cur.execute("""
+    # Tasks assigned to this member (with leader name), by deadline; tasks without one come last
+    page = keyset_paginate(cur, """
         SELECT 
             t.task_id,
             t.title,
@@ -156,20 +145,43 @@ def member_view_tasks():
             t.status,
             t.priority,
             t.due_date,
+            COALESCE(t.due_date, 'infinity'::date)::text AS due_sort,
             tm.name AS team_name,
             u.username AS leader_name
         FROM tasks t
         LEFT JOIN teams tm ON t.team_id = tm.team_id
         LEFT JOIN users u ON tm.leader_id = u.user_id
-        WHERE t.assigned_to = %s
-        ORDER BY t.due_date ASC;
-    """, (user_id,))
-    tasks = cur.fetchall()
+        WHERE t.assigned_to = %s AND {keyset}
+    """, (user_id,), [("COALESCE(t.due_date, 'infinity'::date)", "due_sort"), ("t.task_id", "task_id")],
+        page_size, after)
 
     cur.close()
     conn.close()
 
-    return render_template("member_viewTasks.html", member=member, tasks=tasks)
+    return render_template("member_viewTasks.html", member=member, tasks=page.items, page=page)
+
+
+# ---------------------------------------------
+# Search Tasks & Comments of the Member's Teams
+# ---------------------------------------------
+@member_mainpage_bp.route("/member-searchTasks")
+def member_search_tasks():
+    if g.current_user is None:
+        flash("Please log in first.", "error")
+        return redirect("/member-login")
+
+    query = request.args.get("q", "").strip()
+    page = None
+
+    if query:
+        page_size, after = page_args()
+        conn = get_db_connection()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        page = search_tasks(cur, g.current_user["user_id"], query, page_size, after)
+        cur.close()
+        conn.close()
+
+    return render_template("member_searchTasks.html", query=query, page=page, member=g.current_user)
 
 
 # ---------------------------------------------
@@ -177,93 +189,34 @@ def member_view_tasks():
 # ---------------------------------------------
 @member_mainpage_bp.route("/member-viewTask/<int:task_id>")
 def member_view_task(task_id):
-    if "member_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/member-login")
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # ---------------------------------------------------
-    # Load task details (NO team_name)
-    # ---------------------------------------------------
-    cur.execute("""
-        SELECT 
-            t.task_id,
-            t.title,
-            t.description,
-            t.status,
-            t.priority,
-            t.due_date,
-            t.created_at,
-            cu.username AS created_by_username,
-            au.username AS assigned_to_username,
-            tm.team_id,
-            NULL AS team_name         -- database does NOT contain team_name
-        FROM tasks t
-        JOIN users cu ON t.created_by = cu.user_id
-        JOIN users au ON t.assigned_to = au.user_id
-        JOIN teams tm ON t.team_id = tm.team_id
-        WHERE t.task_id = %s;
-    """, (task_id,))
-    
-    task = cur.fetchone()
+    # Answer a conditional request before loading the task
+    version = page_version(cur, "member_view_task", TASK_VERSION_QUERY, (task_id,))
+    cur.close()
+    not_modified = version.not_modified() if version else None
+    if not_modified:
+        conn.close()
+        return not_modified
+
+    # Task + comments + attachments in a single query
+    task = load_task_detail(conn, task_id)
+    conn.close()
 
     if not task:
-        cur.close()
-        conn.close()
         flash("Task not found.", "error")
         return redirect(url_for("member_mainpage_bp.member_view_tasks"))
 
-    # ---------------------------------------------------
-    # Load comments
-    # ---------------------------------------------------
-    cur.execute("""
-        SELECT 
-            c.comment_id,
-            c.content,
-            c.created_at,
-            u.username
-        FROM comments c
-        JOIN users u ON c.author_id = u.user_id
-        WHERE c.task_id = %s
-        ORDER BY c.created_at DESC;
-    """, (task_id,))
-    
-    comments = cur.fetchall()
-
-    # ---------------------------------------------------
-    # Load attachments
-    # ---------------------------------------------------
-    cur.execute("""
-        SELECT 
-            attachment_id,
-            file_name,
-            file_path,
-            comment_id
-        FROM attachments
-        WHERE task_id = %s;
-    """, (task_id,))
-    
-    attachment_rows = cur.fetchall()
-
-    attachments_by_comment = {}
-    for a in attachment_rows:
-        attachments_by_comment.setdefault(a["comment_id"], []).append(a)
-
-    cur.close()
-    conn.close()
-
-    return render_template(
+    return with_validators(version, render_template(
         "member_viewTask.html",
         task=task,
-        comments=comments,
-        attachments_by_comment=attachments_by_comment
-    )
-
-
-
-
+        comments=task["comments"]
+    ))
 
 
 # ---------------------------------------------
@@ -271,33 +224,23 @@ def member_view_task(task_id):
 # ---------------------------------------------
 @member_mainpage_bp.route("/member-addComment/<int:task_id>", methods=["POST"])
 def member_add_comment(task_id):
-    if "member_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/member-login")
 
     content = request.form.get("content")
     file = request.files.get("file")
+    upload_id = request.form.get("upload_id")      # set when the file was sent through the chunked upload API
 
     if not content:
         flash("Comment cannot be empty.", "error")
         return redirect(url_for("member_mainpage_bp.member_add_comment_page", task_id=task_id))
 
-    member_email = session["member_email"]
+    author_id = g.current_user["user_id"]
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Find member ID
-    cur.execute("SELECT user_id FROM users WHERE email = %s;", (member_email,))
-    member = cur.fetchone()
-    if not member:
-        flash("User not found.", "error")
-        cur.close()
-        conn.close()
-        return redirect(url_for("member_mainpage_bp.member_add_comment_page", task_id=task_id))
-
-    author_id = member["user_id"]
-
     # Insert comment and return ID
     cur.execute("""
         INSERT INTO comments (task_id, author_id, content, created_at)
@@ -306,7 +249,7 @@ def member_add_comment(task_id):
     """, (task_id, author_id, content))
     comment_id = cur.fetchone()["comment_id"]
 
-    # Handle file upload
+    # Handle file upload: streamed into the content-addressed store
     if file and file.filename:
         filename = secure_filename(file.filename)
 
@@ -325,18 +268,37 @@ def member_add_comment(task_id):
             conn.close()
             return redirect(url_for("member_mainpage_bp.member_add_comment_page", task_id=task_id))
 
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-        file_system_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(file_system_path)
-
-        db_path = os.path.join("uploads", filename)
-
-        cur.execute("""
-            INSERT INTO attachments (file_name, file_path, uploaded_by, task_id, comment_id)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (filename, db_path, author_id, task_id, comment_id))
+        try:
+            staged = stage_upload(file.stream, max_size=ATTACHMENT_MAX_SIZE)
+        except AttachmentTooLarge as e:
+            flash(str(e), "error")
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return redirect(url_for("member_mainpage_bp.member_add_comment_page", task_id=task_id))
+        content_type = guess_content_type(filename)
+        try:
+            store_attachment(cur, staged, filename, content_type, author_id, task_id, comment_id)
+        finally:
+            staged.discard()
+        queue_preview(cur, staged.sha256, content_type)
+
+    elif upload_id:
+        try:
+            staged, filename, content_type = finish_upload(cur, parse_upload_id(upload_id), author_id, task_id)
+        except UploadError as e:
+            flash(f"Attachment not added: {e}", "error")
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return redirect(url_for("member_mainpage_bp.member_add_comment_page", task_id=task_id))
+        try:
+            store_attachment(cur, staged, filename, content_type, author_id, task_id, comment_id)
+        finally:
+            staged.discard()
+        queue_preview(cur, staged.sha256, content_type)
 
+    record_task_event(cur, "comment", [task_id], g.current_user, comment_id)
     conn.commit()
     cur.close()
     conn.close()
@@ -351,7 +313,7 @@ def member_add_comment(task_id):
 # ---------------------------------------------
 @member_mainpage_bp.route("/member-addCommentPage/<int:task_id>")
 def member_add_comment_page(task_id):
-    if "member_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/member-login")
 
@@ -367,14 +329,14 @@ def member_add_comment_page(task_id):
         flash("Task not found.", "error")
         return redirect(url_for("member_mainpage_bp.member_view_tasks"))
 
-    return render_template("member_addComment.html", task=task, task_id=task_id)
+    return render_template("member_addComment.html", task=task, task_id=task_id, chunk_size=UPLOAD_CHUNK_SIZE)
 
 # ---------------------------------------------
 # Change Task Status (POST)
 # ---------------------------------------------
 @member_mainpage_bp.route("/member-changeStatus/<int:task_id>", methods=["POST"])
 def member_change_status(task_id):
-    if "member_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/member-login")
 
@@ -386,7 +348,9 @@ def member_change_status(task_id):
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     try:
-        cur.execute("UPDATE tasks SET status = %s WHERE task_id = %s;", (new_status, task_id))
+        cur.execute("UPDATE tasks SET status = %s WHERE task_id = %s AND status <> %s;", (new_status, task_id, new_status))
+        if cur.rowcount:
+            record_task_event(cur, "status", [task_id], g.current_user)
         conn.commit()
         flash(f"Task status updated to {new_status}!", "success")
     except Exception as e:
@@ -399,46 +363,78 @@ def member_change_status(task_id):
     return redirect(url_for("member_mainpage_bp.member_view_tasks"))
 
 
+# ---------------------------------------------
+# --- Batch Update Tasks ---
+# ---------------------------------------------
+@member_mainpage_bp.route("/member-batchUpdateTasks", methods=["POST"])
+def member_batch_update_tasks():
+    """Applies the same changes to a list of task_ids (JSON) in one statement."""
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    try:
+        task_ids, changes = parse_batch_request(request.get_json(silent=True) or {}, "MEMBER")
+    except BatchUpdateError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        updated, unchanged, denied, changed = batch_update_tasks(cur, g.current_user["user_id"], "MEMBER", task_ids, changes)
+        queue_task_event(cur, "status", changed["status"], g.current_user)
+        conn.commit()
+    except BatchUpdateError as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    message = f"{len(updated)} task(s) updated."
+    if unchanged:
+        message += f" {len(unchanged)} task(s) already up to date."
+    if denied:
+        message += f" {len(denied)} task(s) skipped (not found or not allowed)."
+    return jsonify({"message": message, "updated": updated, "unchanged": unchanged, "denied": denied}), 200
+
+
 # -------------------------------------------------
 # Notifications and Deadlines
 # -------------------------------------------------
 @member_mainpage_bp.route("/member-notifications_and_deadlines")
 def member_notifications_and_deadlines():
-    if "member_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/member-login")
 
-    member_email = session["member_email"]
+    member_email = g.current_user["email"]
+    member_id = g.current_user["user_id"]
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Find member_id
-    cur.execute("SELECT user_id FROM users WHERE email = %s;", (member_email,))
-    user = cur.fetchone()
-    if not user:
-        flash("User not found.", "error")
+    # Every comment or change on the member's tasks bumps their versions;
+    # deadlines are relative to today, so the date is part of the ETag, and so
+    # is the read cursor (viewing the page marks its notifications as seen)
+    cursor = notification_cursor(cur, member_id)
+    version = page_version(
+        cur, "member_notifications", ASSIGNED_TASKS_VERSION_QUERY, (member_id,),
+        date.today(), cursor["last_seen_id"], cursor["unread_count"]
+    )
+    not_modified = version.not_modified() if version else None
+    if not_modified:
         cur.close()
         conn.close()
-        return redirect("/member-login")
+        return not_modified
 
-    member_id = user["user_id"]
-
-    # Fetch latest comments on member’s tasks (not written by themselves)
-    cur.execute("""
-        SELECT 
-            c.content,
-            c.created_at,
-            u.username AS author,
-            t.title AS task_title
-        FROM comments c
-        JOIN tasks t ON c.task_id = t.task_id
-        JOIN users u ON c.author_id = u.user_id
-        WHERE t.assigned_to = %s AND c.author_id <> %s
-        ORDER BY c.created_at DESC
-        LIMIT 10;
-    """, (member_id, member_id))
-    incoming_comments = cur.fetchall()
+    # Latest notifications (comments, assignments, status changes); new ones are highlighted
+    notifications = fetch_notifications(cur, member_id, cursor["last_seen_id"])
+    if notifications and notifications[0]["unread"]:
+        mark_notifications_seen(cur, member_id, notifications[0]["notification_id"])
+        conn.commit()
 
     # Fetch deadlines for assigned tasks (excluding DONE)
     cur.execute("""
@@ -458,9 +454,189 @@ def member_notifications_and_deadlines():
     cur.close()
     conn.close()
 
-    return render_template(
+    return with_validators(version, render_template(
         "member_notifications_and_deadlines.html",
-        comments=incoming_comments,
+        notifications=notifications,
         deadlines=active_deadlines,
         email=member_email
-    )
+    ))
+
+
+# ---------------------------------------------
+# --- Chunked Uploads (JSON) ---
+# ---------------------------------------------
+# POST   /member-uploads                 {task_id, file_name, size} -> {upload_id, chunk_size, received}
+# PUT    /member-uploads/<id>            raw chunk, Upload-Offset header -> {received}
+# GET    /member-uploads/<id>            -> {received, total_size} (where to resume)
+# DELETE /member-uploads/<id>            abandons the upload
+# The finished upload is attached by posting upload_id with the comment form.
+def upload_error_response(e):
+    return jsonify({"error": str(e), **e.details}), e.status
+
+
+@member_mainpage_bp.route("/member-uploads", methods=["POST"])
+def member_create_upload():
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        upload = create_upload(
+            cur, g.current_user, parse_task_id(data.get("task_id")),
+            secure_filename(str(data.get("file_name") or "")), data.get("size")
+        )
+        conn.commit()
+    except UploadError as e:
+        conn.rollback()
+        return upload_error_response(e)
+    finally:
+        cur.close()
+        conn.close()
+    return jsonify(upload), 201
+
+
+@member_mainpage_bp.route("/member-uploads/<uuid:upload_id>", methods=["GET", "PUT", "DELETE"])
+def member_upload(upload_id):
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    user_id = g.current_user["user_id"]
+    chunk = None
+    if request.method == "PUT":
+        # The body is read before any database work: a slow client holds no
+        # pooled connection (the one the login lookup may have used is returned)
+        if "db_conn" in g:
+            g.db_conn.commit()
+        release_db_connection()
+        try:
+            chunk = receive_chunk(str(upload_id), request.stream, request.content_length)
+        except UploadError as e:
+            return upload_error_response(e)
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        if request.method == "GET":
+            upload = upload_status(cur, str(upload_id), user_id)
+            return jsonify({"received": upload["received"], "total_size": upload["total_size"]}), 200
+        if request.method == "DELETE":
+            abort_upload(cur, str(upload_id), user_id)
+            conn.commit()
+            return jsonify({"message": "Upload aborted."}), 200
+
+        offset = request.headers.get("Upload-Offset", type=int)
+        received = append_chunk(cur, str(upload_id), user_id, offset, chunk)
+        conn.commit()
+        return jsonify({"received": received}), 200
+    except UploadError as e:
+        conn.rollback()
+        return upload_error_response(e)
+    finally:
+        cur.close()
+        conn.close()
+        if chunk is not None:
+            chunk.discard()
+
+
+# ---------------------------------------------
+# --- Download Attachment ---
+# ---------------------------------------------
+@member_mainpage_bp.route("/member-attachment/<int:attachment_id>")
+def member_download_attachment(attachment_id):
+    """Serves an attachment of a task the user can see (Range and conditional requests supported)."""
+    if g.current_user is None:
+        flash("Please log in first.", "error")
+        return redirect("/member-login")
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    attachment = load_attachment(cur, attachment_id, g.current_user)
+    cur.close()
+    conn.close()
+
+    if attachment is None:
+        return jsonify({"error": "Attachment not found."}), 404
+    return send_attachment(attachment)
+
+
+# ---------------------------------------------
+# --- Attachment Preview ---
+# ---------------------------------------------
+@member_mainpage_bp.route("/member-attachmentPreview/<int:attachment_id>")
+def member_attachment_preview(attachment_id):
+    """Small preview image of an attachment of a task the user can see (404 until it has been made)."""
+    if g.current_user is None:
+        flash("Please log in first.", "error")
+        return redirect("/member-login")
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    attachment = load_attachment(cur, attachment_id, g.current_user)
+    if attachment is None:
+        cur.close()
+        conn.close()
+        return jsonify({"error": "Attachment not found."}), 404
+
+    response = send_preview(cur, attachment)
+    conn.commit()
+    cur.close()
+    conn.close()
+    return response
+
+
+# ---------------------------------------------
+# --- Notifications (JSON) ---
+# ---------------------------------------------
+@member_mainpage_bp.route("/member-notifications")
+def member_notifications():
+    """Newest notifications and the unread count; ?since=<notification_id> returns newer (and recent) ones."""
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    payload = notifications_json(cur, g.current_user["user_id"], request.args.get("since", type=int))
+    cur.close()
+    conn.close()
+    return jsonify(payload), 200
+
+
+@member_mainpage_bp.route("/member-markNotificationsSeen", methods=["POST"])
+def member_mark_notifications_seen():
+    """Moves the read cursor to the notification_id given as JSON {"upto": ...}."""
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    upto = (request.get_json(silent=True) or {}).get("upto")
+    if not isinstance(upto, int) or upto < 0:
+        return jsonify({"error": "upto must be a notification_id."}), 400
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        mark_notifications_seen(cur, g.current_user["user_id"], upto)
+        conn.commit()
+        unread = notification_cursor(cur, g.current_user["user_id"])["unread_count"]
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+    return jsonify({"unread": unread}), 200
+
+
+# ---------------------------------------------
+# --- Live Events (Server-Sent Events) ---
+# ---------------------------------------------
+@member_mainpage_bp.route("/member-events")
+def member_events():
+    """Pushes new comments, assignments and status changes on the member's tasks."""
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    return event_stream_response(g.current_user["user_id"])
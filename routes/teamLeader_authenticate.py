@@ -5,6 +5,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session  # type: ignore
 from psycopg2.extras import RealDictCursor  # type: ignore
 from db import get_db_connection
+from utils.auth_context import remember_user
 
 teamLeader_authenticate_bp = Blueprint("teamLeader_authenticate_bp", __name__)
 
@@ -70,7 +71,7 @@ def teamLeader_login():
         cur = conn.cursor(cursor_factory=RealDictCursor)
         try:
             cur.execute("""
-                SELECT user_id, username, email, password, status
+                SELECT user_id, username, email, password, role, status
                 FROM users
                 WHERE email = %s AND role = 'TEAM_LEADER';
             """, (email,))
@@ -92,6 +93,7 @@ def teamLeader_login():
             session["teamLeader_id"] = leader["user_id"]
             session["teamLeader_email"] = leader["email"]
             session["teamLeader_username"] = leader["username"]
+            remember_user(leader)
 
             flash("Team Leader login successful!", "success")
             return redirect("/teamLeader-mainpage")
@@ -1,34 +1,41 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session  # type: ignore
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, g  # type: ignore
 from psycopg2.extras import RealDictCursor  # type: ignore
 from db import get_db_connection
+from utils.auth_context import current_user_loader
+from utils.task_detail import load_task_detail
+from utils.pagination import page_args
+from utils.search import search_tasks
+from utils.export import EXPORT_DATASETS, EXPORT_FORMATS, export_response
+from utils.task_import import ImportFileError, parse_import_file, import_tasks
+from utils.task_batch import BatchUpdateError, parse_batch_request, batch_update_tasks
+from utils.roster import RosterSyncError, parse_roster, sync_team_roster
+from utils.conditional import TASK_VERSION_QUERY, page_version, with_validators
+from utils.team_cache import TEAM_MEMBERS_QUERY, load_team, forget_team
+from utils.fragment_cache import (
+    TEAM_FRAGMENT_VERSION_QUERY, LEADER_FRAGMENT_VERSION_QUERY, LazyRows, fragment_key
+)
+from utils.invalidation import publish
+from utils.realtime import event_stream_response
+from utils.attachment_download import load_attachment, send_attachment
+from utils.previews import send_preview
+from utils.jobs import PRIORITY_LOW, enqueue
+from utils.notifications import record_task_event, queue_task_event, notification_cursor, mark_notifications_seen, notifications_json
+from config import IMPORT_ERRORS_SHOWN
 
 teamLeader_mainpage_bp = Blueprint("teamLeader_mainpage_bp", __name__)
+teamLeader_mainpage_bp.before_request(current_user_loader("teamLeader"))
 
 # ---------------------------------------------
 # --- Team Leader Dashboard / Main Page ---
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-mainpage")
 def teamLeader_mainpage():
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
-    leader_email = session["teamLeader_email"]
-
-    # Πάρε username και email από τη βάση
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT username, email FROM users WHERE email = %s;", (leader_email,))
-    leader = cur.fetchone()
-    cur.close()
-    conn.close()
-
-    if not leader:
-        flash("Team Leader not found in database.", "error")
-        return redirect("/teamLeader-login")
-
     # Στείλε τα δεδομένα στο template
-    return render_template("teamLeader_mainpage.html", leader=leader)
+    return render_template("teamLeader_mainpage.html", leader=g.current_user)
 
 
 # ---------------------------------------------
@@ -36,40 +43,30 @@ def teamLeader_mainpage():
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-manageTeams")
 def teamLeader_manage_teams():
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
-    leader_email = session["teamLeader_email"]
+    user_id = g.current_user["user_id"]
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Get leader's user_id
-    cur.execute("SELECT user_id FROM users WHERE email = %s;", (leader_email,))
-    user_row = cur.fetchone()
-    if not user_row:
-        flash("User not found.", "error")
-        return redirect("/teamLeader-login")
-
-    user_id = user_row["user_id"]
-
     # Get all teams where the leader is either the leader OR a member
+    # (member_count is maintained by triggers on team_members)
     cur.execute("""
         SELECT 
             t.team_id,
             t.name,
             t.description,
-            COUNT(m.user_id) AS member_count,
+            t.member_count,
             CASE WHEN t.leader_id = %s THEN TRUE ELSE FALSE END AS is_leader
         FROM teams t
-        LEFT JOIN team_members m ON t.team_id = m.team_id
         WHERE t.team_id IN (
             SELECT team_id FROM team_members WHERE user_id = %s
             UNION
             SELECT team_id FROM teams WHERE leader_id = %s
         )
-        GROUP BY t.team_id, t.name, t.description, t.leader_id
         ORDER BY t.name;
     """, (user_id, user_id, user_id))
 
@@ -85,33 +82,33 @@ def teamLeader_manage_teams():
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-manageTeam/<int:team_id>")
 def teamLeader_manage_team(team_id):
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
     conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Get team details (including team_id)
-    cur.execute("""
-        SELECT t.team_id, t.name, t.description, u.username AS leader_name
-        FROM teams t
-        LEFT JOIN users u ON t.leader_id = u.user_id
-        WHERE t.team_id = %s;
-    """, (team_id,))
-    team = cur.fetchone()
+    # Team details come from the per-worker team cache
+    cached = load_team(conn, team_id)
+    team = cached["team"] if cached else None
 
-    # Get members
-    cur.execute("""
-        SELECT u.username, u.email, u.role, u.status
-        FROM team_members tm
-        JOIN users u ON tm.user_id = u.user_id
-        WHERE tm.team_id = %s;
-    """, (team_id,))
-    members = cur.fetchall()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Get tasks for this team (including priority)
-    cur.execute("""
+    # The member and task tables are cached as rendered HTML under their data versions.
+    # Their rows are read after the versions, never from the team cache, which may
+    # not have seen the latest change yet: a block is never stored under a version
+    # newer than its data.
+    cur.execute(TEAM_FRAGMENT_VERSION_QUERY, (team_id,))
+    versions = cur.fetchone()
+    members_fragment = tasks_fragment = None
+    if versions:
+        members_fragment = fragment_key("team_members", team_id, versions["team_version"])
+        tasks_fragment = fragment_key("team_tasks", team_id, versions["team_version"], versions["tasks_version"])
+
+    members = LazyRows(conn, TEAM_MEMBERS_QUERY, (team_id,))
+
+    # Get tasks for this team (including priority); only queried when the table is rendered
+    tasks = LazyRows(conn, """
         SELECT 
             t.task_id,
             t.title,
@@ -125,7 +122,6 @@ def teamLeader_manage_team(team_id):
         WHERE t.team_id = %s
         ORDER BY t.created_at DESC;
     """, (team_id,))
-    tasks = cur.fetchall()
 
     cur.close()
     conn.close()
@@ -135,7 +131,9 @@ def teamLeader_manage_team(team_id):
         team=team,
         members=members,
         tasks=tasks,
-        team_id=team_id
+        team_id=team_id,
+        members_fragment=members_fragment,
+        tasks_fragment=tasks_fragment
     )
 
 
@@ -144,7 +142,7 @@ def teamLeader_manage_team(team_id):
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-addMember/<int:team_id>", methods=["POST"])
 def add_member(team_id):
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
@@ -163,7 +161,9 @@ def add_member(team_id):
             VALUES (%s, %s)
             ON CONFLICT DO NOTHING;
         """, (team_id, user["user_id"]))
+        publish(cur, "team", [team_id])
         conn.commit()
+        forget_team(team_id)
         flash("Member added successfully!", "success")
 
     cur.close()
@@ -176,7 +176,7 @@ def add_member(team_id):
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-removeMember/<int:team_id>", methods=["POST"])
 def remove_member(team_id):
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
@@ -189,7 +189,9 @@ def remove_member(team_id):
     user = cur.fetchone()
     if user:
         cur.execute("DELETE FROM team_members WHERE team_id = %s AND user_id = %s;", (team_id, user["user_id"]))
+        publish(cur, "team", [team_id])
         conn.commit()
+        forget_team(team_id)
         flash("Member removed successfully!", "success")
     else:
         flash("User not found.", "error")
@@ -199,12 +201,35 @@ def remove_member(team_id):
     return redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_team", team_id=team_id))
 
 
+# ---------------------------------------------
+# --- Sync Team Roster (full list of emails) ---
+# ---------------------------------------------
+@teamLeader_mainpage_bp.route("/teamLeader-syncMembers/<int:team_id>", methods=["POST"])
+def sync_members(team_id):
+    if g.current_user is None:
+        flash("Please log in first.", "error")
+        return redirect("/teamLeader-login")
+
+    emails = parse_roster(request.form.get("emails"))
+
+    conn = get_db_connection()
+    try:
+        added, removed = sync_team_roster(conn, team_id, g.current_user["user_id"], emails)
+        forget_team(team_id)
+        flash(f"Roster updated: {added} member(s) added, {removed} removed.", "success")
+    except RosterSyncError as e:
+        flash(str(e), "error")
+    finally:
+        conn.close()
+
+    return redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_team", team_id=team_id))
+
 # ---------------------------------------------
 # --- Create Task for Team ---
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-createTask/<int:team_id>", methods=["POST"])
 def create_task(team_id):
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
@@ -217,12 +242,6 @@ def create_task(team_id):
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    cur.execute("SELECT user_id FROM users WHERE email = %s;", (session["teamLeader_email"],))
-    leader = cur.fetchone()
-    if not leader:
-        flash("Leader not found.", "error")
-        return redirect("/teamLeader-login")
-
     cur.execute("SELECT user_id FROM users WHERE email = %s;", (assigned_email,))
     assigned = cur.fetchone()
     if not assigned:
@@ -231,8 +250,10 @@ def create_task(team_id):
 
     cur.execute("""
         INSERT INTO tasks (title, description, created_by, assigned_to, team_id, status, priority, due_date, created_at)
-        VALUES (%s, %s, %s, %s, %s, 'TODO', %s, %s, NOW());
-    """, (title, description, leader["user_id"], assigned["user_id"], team_id, priority, due_date))
+        VALUES (%s, %s, %s, %s, %s, 'TODO', %s, %s, NOW())
+        RETURNING task_id;
+    """, (title, description, g.current_user["user_id"], assigned["user_id"], team_id, priority, due_date))
+    record_task_event(cur, "assignment", [cur.fetchone()["task_id"]], g.current_user)
     conn.commit()
 
     cur.close()
@@ -242,106 +263,94 @@ def create_task(team_id):
     return redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_team", team_id=team_id))
 
 
+# ---------------------------------------------
+# --- Bulk Import Tasks (CSV / JSON) ---
+# ---------------------------------------------
+@teamLeader_mainpage_bp.route("/teamLeader-importTasks/<int:team_id>", methods=["POST"])
+def teamLeader_import_tasks(team_id):
+    if g.current_user is None:
+        flash("Please log in first.", "error")
+        return redirect("/teamLeader-login")
+
+    back = redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_team", team_id=team_id))
+    file = request.files.get("file")
+    if not file or not file.filename:
+        flash("Please choose a CSV or JSON file to import.", "error")
+        return back
+
+    try:
+        rows = parse_import_file(file.filename, file.read())
+    except ImportFileError as e:
+        flash(str(e), "error")
+        return back
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+
+    cur.execute("SELECT 1 FROM teams WHERE team_id = %s AND leader_id = %s;", (team_id, g.current_user["user_id"]))
+    if not cur.fetchone():
+        cur.close()
+        conn.close()
+        flash("Unauthorized or team not found.", "error")
+        return redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_teams"))
+    cur.close()
+
+    imported, errors = import_tasks(conn, team_id, g.current_user["user_id"], rows)
+    conn.close()
+
+    if errors:
+        invalid_rows = len({row_number for row_number, _ in errors})
+        flash(f"Import failed: {invalid_rows} invalid row(s), no tasks were imported.", "error")
+        for row_number, message in errors[:IMPORT_ERRORS_SHOWN]:
+            flash(f"Row {row_number}: {message}", "error")
+        if len(errors) > IMPORT_ERRORS_SHOWN:
+            flash(f"... and {len(errors) - IMPORT_ERRORS_SHOWN} more.", "error")
+    elif imported == 0:
+        flash("The file contains no tasks.", "error")
+    else:
+        flash(f"{imported} task(s) imported successfully!", "success")
+    return back
+
+
 # ---------------------------------------------
 # --- View Task Details (with Comments) ---
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-viewTask/<int:task_id>")
 def view_task(task_id):
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
     conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
-        # ----------------------------------------------
-        # LOAD TASK (NO team_name — your DB doesn't have it)
-        # ----------------------------------------------
-        cur.execute("""
-            SELECT 
-                t.task_id,
-                t.title,
-                t.description,
-                t.status,
-                t.priority,
-                t.due_date,
-                t.team_id,
-                cu.username AS created_by_username,
-                au.username AS assigned_to_username
-            FROM tasks t
-            JOIN users cu ON t.created_by = cu.user_id
-            JOIN users au ON t.assigned_to = au.user_id
-            WHERE t.task_id = %s;
-        """, (task_id,))
-        task = cur.fetchone()
-
-        if not task:
-            flash("Task not found.", "error")
-            return redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_teams"))
-
-        # ----------------------------------------------
-        # LOAD COMMENTS
-        # ----------------------------------------------
-        cur.execute("""
-            SELECT 
-                c.comment_id,
-                c.content,
-                c.created_at,
-                u.username
-            FROM comments c
-            JOIN users u ON c.author_id = u.user_id
-            WHERE c.task_id = %s
-            ORDER BY c.created_at DESC;
-        """, (task_id,))
-        comments = cur.fetchall()
-
-        # ----------------------------------------------
-        # LOAD ATTACHMENTS
-        # ----------------------------------------------
-        cur.execute("""
-            SELECT 
-                attachment_id,
-                file_name,
-                file_path,
-                comment_id
-            FROM attachments
-            WHERE task_id = %s;
-        """, (task_id,))
-        attachment_rows = cur.fetchall()
-
-        # Group attachments by comment_id
-        attachments_by_comment = {}
-        for a in attachment_rows:
-            attachments_by_comment.setdefault(a["comment_id"], []).append(a)
+        # Answer a conditional request before loading the task
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        version = page_version(cur, "teamLeader_view_task", TASK_VERSION_QUERY, (task_id,))
+        cur.close()
+        not_modified = version.not_modified() if version else None
+        if not_modified:
+            return not_modified
 
+        # Task + comments + attachments in a single query
+        task = load_task_detail(conn, task_id)
     except Exception as e:
         conn.rollback()
         flash(f"Error loading task: {e}", "error")
-        comments = []
-        task = None
-        attachments_by_comment = {}
-
+        return redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_teams"))
     finally:
-        cur.close()
         conn.close()
 
     if not task:
+        flash("Task not found.", "error")
         return redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_teams"))
 
-    # -------------------------------------------------------
-    # RETURN WITH attachments_by_comment INCLUDED
-    # -------------------------------------------------------
-    return render_template(
+    return with_validators(version, render_template(
         "teamLeader_viewTask.html",
         task=task,
-        comments=comments,
-        attachments_by_comment=attachments_by_comment,
+        comments=task["comments"],
         team_id=task["team_id"]
-    )
-
-
-
+    ))
 
 
 # ---------------------------------------------
@@ -349,7 +358,7 @@ def view_task(task_id):
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-editTask/<int:task_id>", methods=["GET", "POST"])
 def edit_task(task_id):
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
@@ -366,10 +375,15 @@ def edit_task(task_id):
         
 
         cur.execute("""
-            UPDATE tasks
+            UPDATE tasks t
             SET title = %s, description = %s, status = %s, due_date = %s, priority = %s
-            WHERE task_id = %s;
-        """, (title, description, status, due_date, priority, task_id))
+            FROM (SELECT status FROM tasks WHERE task_id = %s FOR UPDATE) old
+            WHERE t.task_id = %s
+            RETURNING old.status AS old_status;
+        """, (title, description, status, due_date, priority, task_id, task_id))
+        row = cur.fetchone()
+        if row is not None and row["old_status"] != status:
+            record_task_event(cur, "status", [task_id], g.current_user)
         conn.commit()
 
         flash("Task updated successfully!", "success")
@@ -390,13 +404,15 @@ def edit_task(task_id):
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-deleteTask/<int:task_id>", methods=["POST"])
 def delete_task(task_id):
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
     conn = get_db_connection()
     cur = conn.cursor()
     cur.execute("DELETE FROM tasks WHERE task_id = %s;", (task_id,))
+    # Blobs of the cascaded attachments are removed off the request path
+    enqueue(cur, "gc-attachment-blobs", priority=PRIORITY_LOW, dedupe_key="gc-attachment-blobs")
     conn.commit()
     cur.close()
     conn.close()
@@ -412,43 +428,36 @@ def delete_task(task_id):
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-manageTasksProjects")
 def teamLeader_manage_tasks_projects():
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
-    leader_email = session["teamLeader_email"]
+    leader_email = g.current_user["email"]
+    leader_id = g.current_user["user_id"]
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # -------------------------------
-    # Get the user_id of the leader
-    # -------------------------------
-    cur.execute("SELECT user_id FROM users WHERE email = %s", (leader_email,))
-    leader_row = cur.fetchone()
-    if not leader_row:
-        flash("Leader not found.", "error")
-        cur.close()
-        conn.close()
-        return redirect("/teamLeader-mainpage")
-
-    leader_id = leader_row["user_id"]
+    # The team cards and the task table are cached as rendered HTML under their data versions
+    cur.execute(LEADER_FRAGMENT_VERSION_QUERY, {"leader_id": leader_id})
+    versions = cur.fetchone()
+    teams_fragment = fragment_key("leader_teams", leader_id, versions["teams_version"])
+    tasks_fragment = fragment_key("leader_tasks", leader_id, versions["teams_version"], versions["tasks_version"])
 
     # -------------------------------
     # Get all teams of this leader
     # -------------------------------
-    cur.execute("""
+    teams = LazyRows(conn, """
         SELECT team_id, name AS team_name, description
         FROM teams
         WHERE leader_id = %s
     """, (leader_id,))
-    teams = cur.fetchall()
 
     # -------------------------------
     # Get all tasks of the leader’s teams
     # Include assigned username and team name
     # -------------------------------
-    cur.execute("""
+    tasks = LazyRows(conn, """
         SELECT 
             t.task_id, 
             t.title, 
@@ -464,7 +473,6 @@ def teamLeader_manage_tasks_projects():
         WHERE tm.leader_id = %s
         ORDER BY tm.name ASC, t.due_date ASC;
     """, (leader_id,))
-    tasks = cur.fetchall()
 
     cur.close()
     conn.close()
@@ -473,17 +481,117 @@ def teamLeader_manage_tasks_projects():
         "teamLeader_manageTasksProjects.html",
         teams=teams,
         tasks=tasks,
-        email=leader_email
+        email=leader_email,
+        teams_fragment=teams_fragment,
+        tasks_fragment=tasks_fragment
     )
 
 
+# ---------------------------------------------
+# --- Batch Update Tasks ---
+# ---------------------------------------------
+@teamLeader_mainpage_bp.route("/teamLeader-batchUpdateTasks", methods=["POST"])
+def teamLeader_batch_update_tasks():
+    """Applies the same changes to a list of task_ids (JSON) in one statement."""
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    try:
+        task_ids, changes = parse_batch_request(request.get_json(silent=True) or {}, "TEAM_LEADER")
+    except BatchUpdateError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        updated, unchanged, denied, changed = batch_update_tasks(
+            cur, g.current_user["user_id"], "TEAM_LEADER", task_ids, changes
+        )
+        # Only the tasks whose assignee or status actually changed notify anyone
+        queue_task_event(cur, "assignment", changed.get("assigned_to"), g.current_user)
+        queue_task_event(cur, "status", changed.get("status"), g.current_user)
+        conn.commit()
+    except BatchUpdateError as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    message = f"{len(updated)} task(s) updated."
+    if unchanged:
+        message += f" {len(unchanged)} task(s) already up to date."
+    if denied:
+        message += f" {len(denied)} task(s) skipped (not found or not allowed)."
+    return jsonify({"message": message, "updated": updated, "unchanged": unchanged, "denied": denied}), 200
+
+
+# ---------------------------------------------
+# --- Search Tasks & Comments ---
+# ---------------------------------------------
+@teamLeader_mainpage_bp.route("/teamLeader-searchTasks")
+def teamLeader_search_tasks():
+    if g.current_user is None:
+        flash("Please log in first.", "error")
+        return redirect("/teamLeader-login")
+
+    query = request.args.get("q", "").strip()
+    page = None
+
+    if query:
+        page_size, after = page_args()
+        conn = get_db_connection()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        page = search_tasks(cur, g.current_user["user_id"], query, page_size, after)
+        cur.close()
+        conn.close()
+
+    return render_template("teamLeader_searchTasks.html", query=query, page=page)
+
+
+# ---------------------------------------------
+# --- Export Tasks / Comments / Attachments ---
+# ---------------------------------------------
+@teamLeader_mainpage_bp.route("/teamLeader-export/<string:dataset>")
+def teamLeader_export(dataset):
+    if g.current_user is None:
+        flash("Please log in first.", "error")
+        return redirect("/teamLeader-login")
+
+    fmt = request.args.get("format", "csv")
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        flash("Unknown export dataset or format.", "error")
+        return redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_teams"))
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+
+    # Only teams led by the current leader; ?team_id=... narrows it to one of them
+    cur.execute("SELECT team_id FROM teams WHERE leader_id = %s;", (g.current_user["user_id"],))
+    team_ids = [row["team_id"] for row in cur.fetchall()]
+    cur.close()
+    conn.close()
+
+    team_id = request.args.get("team_id", type=int)
+    if team_id is not None:
+        if team_id not in team_ids:
+            flash("Unauthorized or team not found.", "error")
+            return redirect(url_for("teamLeader_mainpage_bp.teamLeader_manage_teams"))
+        team_ids = [team_id]
+
+    prefix = f"team{team_id}" if team_id is not None else "my_teams"
+    return export_response(dataset, fmt, prefix, team_ids)
+
 
 # ---------------------------------------------
 # --- Add Comment to Task ---
 # ---------------------------------------------
 @teamLeader_mainpage_bp.route("/teamLeader-addComment/<int:task_id>", methods=["POST"])
 def add_comment(task_id):
-    if "teamLeader_email" not in session:
+    if g.current_user is None:
         flash("Please log in first.", "error")
         return redirect("/teamLeader-login")
 
@@ -493,28 +601,18 @@ def add_comment(task_id):
         flash("Comment cannot be empty.", "error")
         return redirect(url_for("teamLeader_mainpage_bp.view_task", task_id=task_id))
 
-    leader_email = session["teamLeader_email"]
+    author_id = g.current_user["user_id"]
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Get the author_id (user_id) of the currently logged-in team leader
-    cur.execute("SELECT user_id FROM users WHERE email = %s", (leader_email,))
-    author_row = cur.fetchone()
-
-    if not author_row:
-        flash("Error: User not found.", "error")
-        cur.close()
-        conn.close()
-        return redirect(url_for("teamLeader_mainpage_bp.view_task", task_id=task_id))
-
-    author_id = author_row["user_id"]
-
     # Insert the comment using the correct column name 'author_id'
     cur.execute("""
         INSERT INTO comments (task_id, author_id, content, created_at)
         VALUES (%s, %s, %s, NOW())
+        RETURNING comment_id
     """, (task_id, author_id, content))
+    record_task_event(cur, "comment", [task_id], g.current_user, cur.fetchone()["comment_id"])
 
     conn.commit()
     cur.close()
@@ -522,3 +620,103 @@ def add_comment(task_id):
 
     flash("Comment added successfully!", "success")
     return redirect(url_for("teamLeader_mainpage_bp.view_task", task_id=task_id))
+
+
+# ---------------------------------------------
+# --- Download Attachment ---
+# ---------------------------------------------
+@teamLeader_mainpage_bp.route("/teamLeader-attachment/<int:attachment_id>")
+def teamLeader_download_attachment(attachment_id):
+    """Serves an attachment of a task the user can see (Range and conditional requests supported)."""
+    if g.current_user is None:
+        flash("Please log in first.", "error")
+        return redirect("/teamLeader-login")
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    attachment = load_attachment(cur, attachment_id, g.current_user)
+    cur.close()
+    conn.close()
+
+    if attachment is None:
+        return jsonify({"error": "Attachment not found."}), 404
+    return send_attachment(attachment)
+
+
+# ---------------------------------------------
+# --- Attachment Preview ---
+# ---------------------------------------------
+@teamLeader_mainpage_bp.route("/teamLeader-attachmentPreview/<int:attachment_id>")
+def teamLeader_attachment_preview(attachment_id):
+    """Small preview image of an attachment of a task the user can see (404 until it has been made)."""
+    if g.current_user is None:
+        flash("Please log in first.", "error")
+        return redirect("/teamLeader-login")
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    attachment = load_attachment(cur, attachment_id, g.current_user)
+    if attachment is None:
+        cur.close()
+        conn.close()
+        return jsonify({"error": "Attachment not found."}), 404
+
+    response = send_preview(cur, attachment)
+    conn.commit()
+    cur.close()
+    conn.close()
+    return response
+
+
+# ---------------------------------------------
+# --- Notifications (JSON) ---
+# ---------------------------------------------
+@teamLeader_mainpage_bp.route("/teamLeader-notifications")
+def teamLeader_notifications():
+    """Newest notifications and the unread count; ?since=<notification_id> returns newer (and recent) ones."""
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    payload = notifications_json(cur, g.current_user["user_id"], request.args.get("since", type=int))
+    cur.close()
+    conn.close()
+    return jsonify(payload), 200
+
+
+@teamLeader_mainpage_bp.route("/teamLeader-markNotificationsSeen", methods=["POST"])
+def teamLeader_mark_notifications_seen():
+    """Moves the read cursor to the notification_id given as JSON {"upto": ...}."""
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    upto = (request.get_json(silent=True) or {}).get("upto")
+    if not isinstance(upto, int) or upto < 0:
+        return jsonify({"error": "upto must be a notification_id."}), 400
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        mark_notifications_seen(cur, g.current_user["user_id"], upto)
+        conn.commit()
+        unread = notification_cursor(cur, g.current_user["user_id"])["unread_count"]
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        cur.close()
+        conn.close()
+    return jsonify({"unread": unread}), 200
+
+
+# ---------------------------------------------
+# --- Live Events (Server-Sent Events) ---
+# ---------------------------------------------
+@teamLeader_mainpage_bp.route("/teamLeader-events")
+def teamLeader_events():
+    """Pushes new comments and status changes on the tasks the leader created."""
+    if g.current_user is None:
+        return jsonify({"error": "Please log in first."}), 401
+
+    return event_stream_response(g.current_user["user_id"])
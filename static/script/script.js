@@ -78,6 +78,175 @@ function deleteTeam(teamId) {
 }
 
 
+// ===========================
+// Batch Task Updates
+// ===========================
+
+// --- Select / Unselect All Tasks ---
+function toggleAllTasks(source) {
+  document.querySelectorAll(".task-select").forEach(cb => cb.checked = source.checked);
+}
+
+// --- Apply the batch fields to every selected task ---
+function batchUpdateTasks(url) {
+  const taskIds = Array.from(document.querySelectorAll(".task-select:checked")).map(cb => Number(cb.value));
+  if (!taskIds.length) {
+    alert("Select at least one task.");
+    return;
+  }
+
+  const payload = { task_ids: taskIds };
+  document.querySelectorAll("[data-batch-field]").forEach(input => {
+    if (input.value) payload[input.dataset.batchField] = input.value;
+  });
+
+  fetch(url, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(payload)
+  })
+    .then(res => res.json())
+    .then(data => {
+      if (data.message) {
+        alert(data.message);
+        location.reload();
+      } else {
+        alert(`Batch update failed: ${data.error}`);
+      }
+    })
+    .catch(err => alert(`Network error: ${err}`));
+}
+
+
+// ===========================
+// Chunked Attachment Uploads
+// ===========================
+
+const UPLOAD_RETRIES = 5;
+
+// --- Send one chunk, resuming from the server's offset after a failure ---
+async function sendChunks(uploadUrl, file, chunkSize) {
+  let received = 0;
+  let failures = 0;
+  while (received < file.size) {
+    try {
+      const res = await fetch(uploadUrl, {
+        method: "PUT",
+        headers: { "Upload-Offset": String(received) },
+        body: file.slice(received, received + chunkSize)
+      });
+      const data = await res.json();
+      if (res.ok) {
+        received = data.received;
+        failures = 0;
+        continue;
+      }
+      if (data.received === undefined) throw new Error(data.error);
+      received = data.received;
+    } catch (err) {
+      if (++failures > UPLOAD_RETRIES) throw err;
+      await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+      const status = await fetch(uploadUrl).then(res => res.json()).catch(() => ({}));
+      if (status.received !== undefined) received = status.received;
+    }
+  }
+}
+
+// --- Comment form: files larger than one chunk go through the upload API ---
+function submitCommentWithUpload(form) {
+  const input = form.querySelector("input[type=file]");
+  const file = input.files[0];
+  const chunkSize = Number(form.dataset.chunkSize);
+  if (!file || file.size <= chunkSize) return true;
+
+  const button = form.querySelector("button[type=submit]");
+  button.disabled = true;
+  fetch(form.dataset.uploadUrl, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ task_id: Number(form.dataset.taskId), file_name: file.name, size: file.size })
+  })
+    .then(res => res.json().then(data => { if (!res.ok) throw new Error(data.error); return data; }))
+    .then(upload => sendChunks(`${form.dataset.uploadUrl}/${upload.upload_id}`, file, upload.chunk_size).then(() => upload))
+    .then(upload => {
+      form.querySelector("input[name=upload_id]").value = upload.upload_id;
+      input.value = "";
+      form.submit();
+    })
+    .catch(err => {
+      alert(`Upload failed: ${err.message}`);
+      button.disabled = false;
+    });
+  return false;
+}
+
+
+// ===========================
+// Live Events (Server-Sent Events, or polling)
+// ===========================
+
+const LIVE_EVENT_LABELS = {
+  comment: "New comment on",
+  assignment: "You were assigned",
+  status: "Status changed on"
+};
+
+// --- Add one event ({title, status, actor}) to the top of the list ---
+function showLiveEvent(list, type, event) {
+  const item = document.createElement("li");
+  let text = `${LIVE_EVENT_LABELS[type]} "${event.title}"`;
+  if (type === "status") text += ` (now ${event.status})`;
+  item.textContent = `${text} by ${event.actor}`;
+  list.prepend(item);
+  list.hidden = false;
+}
+
+// --- Without a stream: ask the notifications endpoint for anything newer ---
+// A ?since= answer repeats the most recent notifications (rows that
+// committed late can have lower ids), so ids already shown are skipped
+function pollForEvents(list) {
+  let since = null;
+  const shown = new Set();
+  const poll = () => {
+    const url = since === null ? list.dataset.notificationsUrl : `${list.dataset.notificationsUrl}?since=${since}`;
+    fetch(url)
+      .then(res => res.ok ? res.json() : null)
+      .then(data => {
+        if (!data) return;
+        const notifications = data.notifications;
+        notifications.slice().reverse().forEach(n => {
+          if (shown.has(n.notification_id)) return;
+          shown.add(n.notification_id);
+          // The first answer only sets the starting point; older notifications are not "live"
+          if (since !== null && LIVE_EVENT_LABELS[n.kind]) {
+            showLiveEvent(list, n.kind, { title: n.task_title, status: n.status, actor: n.actor });
+          }
+        });
+        if (notifications.length) since = Math.max(since || 0, notifications[0].notification_id);
+        else if (since === null) since = 0;
+      })
+      .catch(() => {});
+  };
+  poll();
+  setInterval(poll, Number(list.dataset.pollInterval) * 1000);
+}
+
+// --- Subscribe a <ul data-events-url> to the user's event stream, or poll ---
+function listenForEvents(list) {
+  if (!list.dataset.streaming || !window.EventSource) {
+    pollForEvents(list);
+    return;
+  }
+  const source = new EventSource(list.dataset.eventsUrl);
+  Object.keys(LIVE_EVENT_LABELS).forEach(type => {
+    source.addEventListener(type, message => showLiveEvent(list, type, JSON.parse(message.data)));
+  });
+  // A 204 (streams not served) or 503 (worker full) closes the source for good
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) pollForEvents(list);
+  };
+}
+
 // ===========================
 // Redirect Buttons (UI Navigation)
 // ===========================
@@ -171,4 +340,8 @@ document.addEventListener("DOMContentLoaded", function() {
     // --- Team Leader Main Page ---
     if (teamLeader_redirect_manageTeams) teamLeader_redirect_manageTeams.addEventListener("click", () => window.location.href = "/teamLeader-manageTeams");
     if (teamLeader_redirect_manageTasksProjects) teamLeader_redirect_manageTasksProjects.addEventListener("click", () => window.location.href = "/teamLeader-manageTasksProjects");
+
+    // --- Live Events ---
+    const live_events = document.getElementById("live_events");
+    if (live_events) listenForEvents(live_events);
 });
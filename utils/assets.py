@@ -0,0 +1,98 @@
+"""
+Fingerprinted static assets.
+
+`build` copies every file of static/css and static/script to static/dist under
+a name that contains a hash of its content (css/style.css -> css/style.1a2b3c4d5e6f.css)
+and writes static/dist/manifest.json. When the manifest exists,
+url_for('static', filename='css/style.css') points to the hashed copy, which
+is served with a one-year immutable Cache-Control: a changed file gets a new
+name, so browsers never revalidate. Without a build the original files are
+served as before.
+
+Usage:
+    python -m utils.assets build      # (re)build static/dist and the manifest
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+from flask import request  # type: ignore
+from config import STATIC_FOLDER
+
+ASSET_DIRS = ("css", "script")
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def build(static_folder=STATIC_FOLDER):
+    """Writes the hashed copies and the manifest; returns the manifest ({source: hashed path})."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        source_dir = os.path.join(static_folder, asset_dir)
+        if not os.path.isdir(source_dir):
+            continue
+        os.makedirs(os.path.join(dist, asset_dir), exist_ok=True)
+        for name in sorted(os.listdir(source_dir)):
+            source = os.path.join(source_dir, name)
+            if not os.path.isfile(source):
+                continue
+            with open(source, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+            stem, ext = os.path.splitext(name)
+            hashed = f"{DIST_DIR}/{asset_dir}/{stem}.{digest}{ext}"
+            shutil.copyfile(source, os.path.join(static_folder, hashed))
+            manifest[f"{asset_dir}/{name}"] = hashed
+
+    with open(os.path.join(dist, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder=STATIC_FOLDER):
+    """Returns the manifest of the last build, or {} when assets were not built."""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def init_assets(app):
+    """Rewrites static URLs to the built names and marks those responses immutable."""
+    manifest = load_manifest(app.static_folder)
+    if not manifest:
+        return
+    dist_prefix = DIST_DIR + "/"
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = manifest[values["filename"]]
+
+    @app.after_request
+    def immutable_static(response):
+        if (request.endpoint == "static" and response.status_code in (200, 304)
+                and request.view_args.get("filename", "").startswith(dist_prefix)):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+def main(argv):
+    if argv != ["build"]:
+        print(__doc__)
+        return 2
+    manifest = build()
+    print(f"{len(manifest)} asset(s) written to {os.path.join(STATIC_FOLDER, DIST_DIR)}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,101 @@
+import os
+import posixpath
+
+from flask import Response, abort, request, send_file  # type: ignore
+from werkzeug.http import quote_header_value  # type: ignore
+from config import STATIC_FOLDER, ATTACHMENT_OFFLOAD, ATTACHMENT_ACCEL_PREFIX
+
+# ---------------------------------------------
+# --- Attachment Downloads ---
+# ---------------------------------------------
+# Attachments are served by id after an access check, never from /static.
+# send_file answers Range (206) and conditional requests (304, If-Range);
+# blobs use their SHA-256 as a strong ETag. With ATTACHMENT_OFFLOAD set, the
+# worker only checks access and hands the file to the front proxy:
+#   "x-accel-redirect": nginx, ATTACHMENT_ACCEL_PREFIX must be an `internal`
+#                       location aliased to the static folder
+#   "x-sendfile":       Apache mod_xsendfile / lighttpd, absolute path
+
+# Who may download what: the task's team or assignee for members, the team
+# leader or task creator for team leaders. Anything else is a 404.
+ATTACHMENT_ACCESS = {
+    "MEMBER": """
+        t.assigned_to = %(user_id)s
+        OR EXISTS (SELECT 1 FROM team_members tm WHERE tm.team_id = t.team_id AND tm.user_id = %(user_id)s)
+    """,
+    "TEAM_LEADER": """
+        t.created_by = %(user_id)s
+        OR EXISTS (SELECT 1 FROM teams tl WHERE tl.team_id = t.team_id AND tl.leader_id = %(user_id)s)
+    """,
+}
+BLOB_CACHE_CONTROL_MAX_AGE = 86400
+
+# Shown in the browser; any other type is sent as application/octet-stream and
+# always as a download, so a stored file can never render as a page of the app
+INLINE_CONTENT_TYPES = {"image/png", "image/jpeg", "image/gif", "application/pdf"}
+FALLBACK_CONTENT_TYPE = "application/octet-stream"
+
+
+def load_attachment(cur, attachment_id, user):
+    """Returns the attachment row if `user` may download it, otherwise None (`cur` is a RealDictCursor)."""
+    cur.execute(f"""
+        SELECT a.attachment_id, a.file_name, a.file_path, a.content_hash, a.content_type
+        FROM attachments a
+        JOIN tasks t ON t.task_id = a.task_id
+        WHERE a.attachment_id = %(attachment_id)s
+          AND ({ATTACHMENT_ACCESS[user["role"]]});
+    """, {"attachment_id": attachment_id, "user_id": user["user_id"]})
+    return cur.fetchone()
+
+
+def _content_disposition(attachment, as_attachment):
+    kind = "attachment" if as_attachment else "inline"
+    return f"{kind}; filename={quote_header_value(attachment['file_name'])}"
+
+
+def send_attachment(attachment):
+    """
+    Response for an authorized attachment. Images and PDFs are shown inline
+    unless ?download=1 is given; everything else is always a download.
+    """
+    path = os.path.join(STATIC_FOLDER, attachment["file_path"])
+    if not os.path.isfile(path):
+        abort(404)
+    mimetype = attachment["content_type"]
+    if mimetype not in INLINE_CONTENT_TYPES:
+        mimetype = FALLBACK_CONTENT_TYPE
+    as_attachment = mimetype == FALLBACK_CONTENT_TYPE or request.args.get("download") == "1"
+
+    if ATTACHMENT_OFFLOAD in ("x-accel-redirect", "x-sendfile"):
+        response = Response(mimetype=mimetype)
+        if ATTACHMENT_OFFLOAD == "x-accel-redirect":
+            response.headers["X-Accel-Redirect"] = ATTACHMENT_ACCEL_PREFIX + attachment["file_path"]
+        else:
+            response.headers["X-Sendfile"] = os.path.abspath(path)
+        response.headers["Content-Disposition"] = _content_disposition(attachment, as_attachment)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        return response
+
+    response = send_file(
+        os.path.abspath(path),
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=attachment["file_name"],
+        conditional=True,
+        etag=attachment["content_hash"] or True,
+        max_age=BLOB_CACHE_CONTROL_MAX_AGE if attachment["content_hash"] else None,
+    )
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+def block_static_uploads():
+    """before_request hook: uploads are only reachable through the download routes."""
+    if request.endpoint != "static":
+        return
+    # Normalized first, the way the file is looked up: "./uploads/x" and "css/../uploads/x" are uploads too
+    filename = posixpath.normpath((request.view_args or {}).get("filename", "").replace("\\", "/")).lstrip("/")
+    if filename == "uploads" or filename.startswith("uploads/"):
+        abort(404)
@@ -0,0 +1,254 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+
+from config import ATTACHMENT_STORAGE, ATTACHMENT_CHUNK_SIZE, ORPHAN_BLOB_GRACE, STATIC_FOLDER, ALLOWED_EXTENSIONS
+
+# ---------------------------------------------
+# --- Content-addressed Attachment Storage ---
+# ---------------------------------------------
+# An upload is streamed to a temporary file in chunks while it is hashed, then
+# moved to <ATTACHMENT_STORAGE>/<first two hex digits>/<sha256>. Identical
+# files therefore share one blob and names never collide; file_name keeps the
+# name the user uploaded. attachment_blobs (migration 0009) holds one row per
+# blob with a trigger-maintained reference count.
+#
+# Ordering with the garbage collector: a blob file is moved into place only
+# after its attachment_blobs row is locked by the upsert, and the collector
+# deletes the row (locking it) before unlinking the file, so a blob that is
+# being reused is never removed.
+#
+# The file is in place before the caller commits, so a rolled-back upload
+# leaves a file without a row. The collector also deletes those, once they
+# are ORPHAN_BLOB_GRACE seconds old; storing a blob refreshes its file's
+# mtime, so a file reused by a transaction still in progress is kept.
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+STAGING_DIR = ".staging"
+PREVIEW_DIR = "previews"
+PREVIEW_SUFFIX = ".jpg"
+NO_PREVIEW_SUFFIX = ".none"
+
+
+class AttachmentTooLarge(Exception):
+    """Raised while streaming when a file exceeds the allowed size."""
+
+
+class StagedFile:
+    """A fully received upload waiting to be stored: temp path, sha256 and size."""
+
+    def __init__(self, path, sha256, size):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+    def discard(self):
+        """Removes the temporary file (no-op once it has been stored)."""
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+
+def blob_relpath(sha256):
+    """Path of a blob relative to the storage root."""
+    return os.path.join(sha256[:2], sha256)
+
+
+def blob_path(sha256):
+    """Filesystem path of a blob."""
+    return os.path.join(ATTACHMENT_STORAGE, blob_relpath(sha256))
+
+
+def preview_path(sha256, suffix=PREVIEW_SUFFIX):
+    """Filesystem path of a blob's preview image (or, with NO_PREVIEW_SUFFIX, of its "no preview" marker)."""
+    return os.path.join(ATTACHMENT_STORAGE, PREVIEW_DIR, blob_relpath(sha256) + suffix)
+
+
+def staging_dir():
+    path = os.path.join(ATTACHMENT_STORAGE, STAGING_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def stage_upload(stream, max_size=None):
+    """
+    Copies a file-like object to a temporary file in ATTACHMENT_CHUNK_SIZE
+    chunks, hashing it on the way. Raises AttachmentTooLarge (after removing
+    the partial file) as soon as more than `max_size` bytes have been read.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(dir=staging_dir())
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(ATTACHMENT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise AttachmentTooLarge(f"File is larger than {max_size} bytes.")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return StagedFile(path, digest.hexdigest(), size)
+
+
+def guess_content_type(file_name):
+    """
+    Content type of an allow-listed extension (ALLOWED_EXTENSIONS), else
+    octet-stream. The type a client declares is never used: it is what the
+    file is later served as.
+    """
+    ext = file_name.rsplit(".", 1)[1].lower() if "." in file_name else ""
+    if ext not in ALLOWED_EXTENSIONS:
+        return DEFAULT_CONTENT_TYPE
+    return mimetypes.guess_type(f"file.{ext}")[0] or DEFAULT_CONTENT_TYPE
+
+
+def store_blob(cur, staged, content_type):
+    """Records the blob on the cursor's transaction and moves the staged file into the store if it is new."""
+    # Upserting locks the blob row until commit (see the note on the collector)
+    cur.execute("""
+        INSERT INTO attachment_blobs (sha256, size_bytes, content_type)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (sha256) DO UPDATE SET size_bytes = EXCLUDED.size_bytes;
+    """, (staged.sha256, staged.size, content_type))
+
+    target = blob_path(staged.sha256)
+    if os.path.exists(target):
+        staged.discard()
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(staged.path, target)
+        staged.path = None
+    # Younger than ORPHAN_BLOB_GRACE until this transaction is long over
+    os.utime(target)
+
+
+def store_attachment(cur, staged, file_name, content_type, uploaded_by, task_id, comment_id):
+    """
+    Records the attachment on the cursor's transaction and moves the staged
+    file into the store (unless that content is stored already). Returns the
+    attachment_id; the caller commits, or rolls back and discards `staged`.
+    """
+    store_blob(cur, staged, content_type)
+    cur.execute("""
+        INSERT INTO attachments
+            (file_name, file_path, uploaded_by, task_id, comment_id, content_hash, size_bytes, content_type)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING attachment_id;
+    """, (
+        file_name, storage_file_path(staged.sha256), uploaded_by, task_id, comment_id,
+        staged.sha256, staged.size, content_type,
+    ))
+    row = cur.fetchone()
+    return row["attachment_id"] if isinstance(row, dict) else row[0]
+
+
+def storage_file_path(sha256):
+    """Value of attachments.file_path for a blob (relative to the static folder, like older rows)."""
+    return os.path.relpath(blob_path(sha256), STATIC_FOLDER).replace(os.sep, "/")
+
+
+def _remove_blob_files(sha256):
+    for path in (blob_path(sha256), preview_path(sha256), preview_path(sha256, NO_PREVIEW_SUFFIX)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _old_blob_files(max_mtime):
+    """sha256 of the blob files last stored before `max_mtime` (skips staging and previews)."""
+    if not os.path.isdir(ATTACHMENT_STORAGE):
+        return []
+    found = []
+    for prefix in os.listdir(ATTACHMENT_STORAGE):
+        directory = os.path.join(ATTACHMENT_STORAGE, prefix)
+        if len(prefix) != 2 or not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.startswith(prefix) and entry.stat().st_mtime < max_mtime:
+                found.append(entry.name)
+    return found
+
+
+def collect_garbage(conn, grace=ORPHAN_BLOB_GRACE):
+    """
+    Deletes the blobs no attachment references, and their files and previews,
+    then the blob files older than `grace` seconds that have no row (left by
+    rolled-back uploads). Returns how many blobs were removed.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM attachment_blobs WHERE ref_count = 0 RETURNING sha256;")
+        removed = [row[0] for row in cur.fetchall()]
+        # Unlinked while the rows are still locked, then committed
+        for sha256 in removed:
+            _remove_blob_files(sha256)
+        conn.commit()
+
+        max_mtime = time.time() - grace
+        candidates = _old_blob_files(max_mtime)
+        cur.execute("SELECT sha256 FROM attachment_blobs WHERE sha256 = ANY(%s);", (candidates,))
+        known = {row[0] for row in cur.fetchall()}
+        conn.commit()
+        orphans = 0
+        for sha256 in candidates:
+            if sha256 in known:
+                continue
+            # Checked again: store_blob() touches a file it reuses
+            try:
+                if os.path.getmtime(blob_path(sha256)) >= max_mtime:
+                    continue
+            except FileNotFoundError:
+                continue
+            _remove_blob_files(sha256)
+            orphans += 1
+        return len(removed) + orphans
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def store_legacy_attachments(conn):
+    """
+    Moves attachments saved before the store (content_hash NULL) into it; rows
+    whose file is missing are left as they are. Returns how many were stored.
+    The original files are not deleted.
+    """
+    cur = conn.cursor()
+    stored = 0
+    try:
+        cur.execute("SELECT attachment_id, file_name, file_path FROM attachments WHERE content_hash IS NULL;")
+        for attachment_id, file_name, file_path in cur.fetchall():
+            source = os.path.join(STATIC_FOLDER, file_path)
+            if not os.path.isfile(source):
+                continue
+            with open(source, "rb") as f:
+                staged = stage_upload(f)
+            content_type = guess_content_type(file_name)
+            try:
+                store_blob(cur, staged, content_type)
+                cur.execute("""
+                    UPDATE attachments
+                    SET content_hash = %s, size_bytes = %s, content_type = %s, file_path = %s
+                    WHERE attachment_id = %s;
+                """, (staged.sha256, staged.size, content_type, storage_file_path(staged.sha256), attachment_id))
+                conn.commit()
+            finally:
+                staged.discard()
+            stored += 1
+        return stored
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
@@ -0,0 +1,86 @@
+from flask import g, session  # type: ignore
+from psycopg2.extras import RealDictCursor  # type: ignore
+from db import get_db_connection
+from config import AUTH_CACHE_SIZE
+from utils.cache import LRUCache
+from utils.invalidation import subscribe
+
+# Session key prefix used by each login flow -> role stored in users.role
+ROLE_BY_SESSION_PREFIX = {
+    "admin": "ADMIN",
+    "teamLeader": "TEAM_LEADER",
+    "member": "MEMBER",
+}
+
+# user_id -> {user_id, username, email, role, status}
+_user_cache = LRUCache(AUTH_CACHE_SIZE)
+
+
+def remember_user(user):
+    """Caches the identity resolved at login so later requests skip the users lookup."""
+    _user_cache.set(user["user_id"], {
+        "user_id": user["user_id"],
+        "username": user["username"],
+        "email": user["email"],
+        "role": user["role"],
+        "status": user["status"],
+    })
+
+
+def forget_user(user_id):
+    """Drops a cached identity (status or role changed)."""
+    _user_cache.delete(user_id)
+
+
+def auth_cache_stats():
+    """Returns size and hit/miss counters of this worker's identity cache."""
+    return _user_cache.stats()
+
+
+def load_user(user_id):
+    """Returns the cached identity of a user, querying the database on a miss."""
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    conn = get_db_connection()
+    if isinstance(conn, str):
+        return None
+
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("""
+        SELECT user_id, username, email, role, status
+        FROM users
+        WHERE user_id = %s;
+    """, (user_id,))
+    row = cur.fetchone()
+    cur.close()
+    conn.close()
+
+    if not row:
+        return None
+    remember_user(row)
+    return _user_cache.get(user_id)
+
+
+def current_user_loader(session_prefix):
+    """
+    Builds a before_request hook that sets g.current_user for a blueprint.
+    g.current_user is None unless the session holds an ACTIVE user of the expected role.
+    """
+    role = ROLE_BY_SESSION_PREFIX[session_prefix]
+
+    def load_current_user():
+        g.current_user = None
+        user_id = session.get(f"{session_prefix}_id")
+        if user_id is None:
+            return
+        user = load_user(user_id)
+        if user and user["role"] == role and user["status"] == "ACTIVE":
+            g.current_user = user
+
+    return load_current_user
+
+
+# Other workers evict their copies through the invalidation bus
+subscribe("user", lambda user_ids: [forget_user(user_id) for user_id in user_ids], _user_cache.clear)
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+
+from config import ATTACHMENT_CHUNK_SIZE, ATTACHMENT_MAX_SIZE, UPLOAD_CHUNK_SIZE, UPLOAD_EXPIRY_HOURS
+from utils.attachment_store import StagedFile, guess_content_type, staging_dir
+from utils.attachment_download import ATTACHMENT_ACCESS
+from utils.file_utils import allowed_file
+
+# ---------------------------------------------
+# --- Chunked, Resumable Uploads ---
+# ---------------------------------------------
+# 1. create_upload():  declares name, size and task; returns an upload_id
+# 2. receive_chunk():  each request carries up to UPLOAD_CHUNK_SIZE bytes,
+#                      streamed to a side file before any database work, so
+#                      a slow client holds no pooled connection or row lock
+#    append_chunk():   locks the upload, checks that the chunk starts at the
+#                      current offset, copies it into the staging file,
+#                      fsyncs, then `received` is committed
+# 3. upload_status():  after a failure the client asks for `received` and
+#                      resumes from there (a partly written chunk is cut off)
+# 4. finish_upload():  once complete, hashes the staging file in place and
+#                      hands it to the blob store, which moves it atomically
+#
+# The staging file lives in the store's staging directory, so the final move is
+# a rename on the same filesystem. The declared size is capped at
+# ATTACHMENT_MAX_SIZE, and no chunk may write past it.
+
+
+class UploadError(Exception):
+    """Raised when an upload request cannot be applied; carries the HTTP status."""
+
+    def __init__(self, message, status=400, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+def parse_upload_id(value):
+    """Returns a client-supplied upload id in canonical form; raises a 400 UploadError if it is not a UUID."""
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        raise UploadError("Invalid upload_id.")
+
+
+def parse_task_id(value):
+    """Returns a client-supplied task id as an int; raises a 400 UploadError if it is not a task number."""
+    try:
+        task_id = int(value)
+    except (TypeError, ValueError):
+        raise UploadError("task_id must be a task number.")
+    if not 0 < task_id < 2 ** 31:              # tasks.task_id is an integer column
+        raise UploadError("task_id must be a task number.")
+    return task_id
+
+
+def staging_path(upload_id):
+    return os.path.join(staging_dir(), f"upload-{upload_id}")
+
+
+def create_upload(cur, user, task_id, file_name, total_size):
+    """Opens an upload session for a task the user can see; returns its row (`cur` is a RealDictCursor)."""
+    if not file_name or not allowed_file(file_name):
+        raise UploadError("File type not allowed.")
+    if not isinstance(total_size, int) or total_size <= 0:
+        raise UploadError("size must be a positive number of bytes.")
+    if total_size > ATTACHMENT_MAX_SIZE:
+        raise UploadError(f"Files are limited to {ATTACHMENT_MAX_SIZE} bytes.", 413)
+
+    cur.execute(f"""
+        INSERT INTO attachment_uploads (user_id, task_id, file_name, content_type, total_size)
+        SELECT %(user_id)s, t.task_id, %(file_name)s, %(content_type)s, %(total_size)s
+        FROM tasks t
+        WHERE t.task_id = %(task_id)s AND ({ATTACHMENT_ACCESS[user["role"]]})
+        RETURNING upload_id, file_name, total_size, received;
+    """, {
+        "user_id": user["user_id"],
+        "task_id": task_id,
+        "file_name": file_name,
+        "content_type": guess_content_type(file_name),
+        "total_size": total_size,
+    })
+    upload = cur.fetchone()
+    if upload is None:
+        raise UploadError("Task not found.", 404)
+
+    # The staging file exists from the start, so resuming never has to create it
+    open(staging_path(upload["upload_id"]), "wb").close()
+    upload["chunk_size"] = UPLOAD_CHUNK_SIZE
+    return upload
+
+
+def upload_status(cur, upload_id, user_id, lock=False):
+    """Returns the user's upload row or raises a 404 UploadError."""
+    cur.execute(f"""
+        SELECT upload_id, task_id, file_name, content_type, total_size, received
+        FROM attachment_uploads
+        WHERE upload_id = %s AND user_id = %s
+        {"FOR UPDATE" if lock else ""};
+    """, (upload_id, user_id))
+    upload = cur.fetchone()
+    if upload is None:
+        raise UploadError("Upload not found.", 404)
+    return upload
+
+
+def receive_chunk(upload_id, stream, length):
+    """
+    Reads `length` bytes from `stream` into a side file of the upload, without
+    touching the database. Returns it as a StagedFile (no hash) for
+    append_chunk(); the caller discards it afterwards.
+    """
+    if length is None:
+        raise UploadError("Content-Length is required.", 411)
+    if length <= 0 or length > UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"Chunks must be 1 to {UPLOAD_CHUNK_SIZE} bytes.", 413)
+
+    fd, path = tempfile.mkstemp(dir=staging_dir(), prefix=f"upload-{upload_id}.", suffix=".part")
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while written < length:
+                data = stream.read(min(ATTACHMENT_CHUNK_SIZE, length - written))
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+        if written != length:
+            raise UploadError("Chunk ended early; resume from the current offset.")
+    except BaseException:
+        os.remove(path)
+        raise
+    return StagedFile(path, None, written)
+
+
+def append_chunk(cur, upload_id, user_id, offset, chunk):
+    """
+    Appends a chunk received with receive_chunk() at `offset` and records it on
+    the cursor's transaction; returns the new received count. The row lock
+    serializes concurrent requests for the same upload until the caller commits.
+    """
+    upload = upload_status(cur, upload_id, user_id, lock=True)
+    received = upload["received"]
+    if offset != received:
+        raise UploadError("Chunk does not start at the current offset.", 409, received=received)
+    if received + chunk.size > upload["total_size"]:
+        raise UploadError("Chunk goes past the declared file size.", 413)
+
+    with open(staging_path(upload_id), "r+b") as f, open(chunk.path, "rb") as data:
+        # Drops whatever a previously interrupted copy left after the committed offset
+        f.truncate(received)
+        f.seek(received)
+        shutil.copyfileobj(data, f, ATTACHMENT_CHUNK_SIZE)
+        f.flush()
+        os.fsync(f.fileno())
+
+    cur.execute("""
+        UPDATE attachment_uploads
+        SET received = received + %s, updated_at = NOW()
+        WHERE upload_id = %s;
+    """, (chunk.size, upload_id))
+    return received + chunk.size
+
+
+def finish_upload(cur, upload_id, user_id, task_id):
+    """
+    Closes a complete upload of `task_id` on the cursor's transaction and
+    returns (StagedFile, file_name, content_type) for store_attachment().
+    """
+    upload = upload_status(cur, upload_id, user_id, lock=True)
+    if upload["task_id"] != task_id:
+        raise UploadError("Upload belongs to another task.", 409)
+    if upload["received"] != upload["total_size"]:
+        raise UploadError("Upload is not complete.", 409, received=upload["received"])
+
+    path = staging_path(upload_id)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(ATTACHMENT_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    cur.execute("DELETE FROM attachment_uploads WHERE upload_id = %s;", (upload_id,))
+    return StagedFile(path, digest.hexdigest(), upload["total_size"]), upload["file_name"], upload["content_type"]
+
+
+def abort_upload(cur, upload_id, user_id):
+    """Deletes an upload session and its staging file."""
+    upload_status(cur, upload_id, user_id, lock=True)
+    cur.execute("DELETE FROM attachment_uploads WHERE upload_id = %s;", (upload_id,))
+    StagedFile(staging_path(upload_id), None, None).discard()
+
+
+def expire_uploads(conn, max_age_hours=UPLOAD_EXPIRY_HOURS):
+    """Deletes uploads without activity for `max_age_hours`; returns how many were removed."""
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            DELETE FROM attachment_uploads
+            WHERE updated_at < NOW() - make_interval(hours => %s)
+            RETURNING upload_id;
+        """, (max_age_hours,))
+        expired = [row[0] for row in cur.fetchall()]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    for upload_id in expired:
+        StagedFile(staging_path(upload_id), None, None).discard()
+    return len(expired)
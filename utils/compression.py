@@ -0,0 +1,98 @@
+import gzip
+
+from flask import request  # type: ignore
+from config import COMPRESS_ENABLED, COMPRESS_MIN_SIZE, COMPRESS_LEVEL
+from utils.cache import LRUCache
+
+try:
+    import brotli  # type: ignore
+except ImportError:                         # optional: gzip only
+    brotli = None
+
+# ---------------------------------------------
+# --- Response Compression (gzip / brotli) ---
+# ---------------------------------------------
+# Compresses HTML, JSON, CSS and JS bodies after the view has run. Streamed
+# responses (exports, Server-Sent Events) and partial or already encoded
+# bodies are left alone. Static files are compressed once per version and
+# kept in a small cache; with built assets (utils/assets.py) browsers then
+# cache them for a year.
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "image/svg+xml",
+}
+BROTLI_QUALITY = 5
+STATIC_CACHE_SIZE = 64
+
+_static_cache = LRUCache(STATIC_CACHE_SIZE)    # (path, etag, encoding) -> compressed bytes
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+
+def choose_encoding():
+    """Best encoding the client accepts, or None."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress_response(response):
+    """after_request hook: replaces the body with its compressed form when worthwhile."""
+    if (response.status_code != 200
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.is_streamed and not response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or "Content-Range" in response.headers
+            or request.method == "HEAD"):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if response.content_length is not None and response.content_length < COMPRESS_MIN_SIZE:
+        return response
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.direct_passthrough:
+        # A static file: compress it once per version (its ETag)
+        etag, _ = response.get_etag()
+        key = (request.path, etag, encoding)
+        data = _static_cache.get(key) if etag else None
+        response.direct_passthrough = False
+        if data is None:
+            data = _compress(response.get_data(), encoding)
+            if etag:
+                _static_cache.set(key, data)
+        else:
+            response.response.close()
+        response.set_data(data)
+        if etag:
+            # The body differs from the identity file, so the validator becomes weak
+            response.set_etag(etag, weak=True)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(_compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app):
+    """Registers the compression hook (it runs after every other after_request hook)."""
+    if COMPRESS_ENABLED:
+        app.after_request_funcs.setdefault(None, []).insert(0, compress_response)
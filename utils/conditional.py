@@ -0,0 +1,86 @@
+import hashlib
+from datetime import timezone
+
+from flask import Response, g, make_response, request, session  # type: ignore
+from config import CACHE_VERSION
+
+# ---------------------------------------------
+# --- Conditional GET (ETag / Last-Modified) ---
+# ---------------------------------------------
+# Task and team rows carry a trigger-maintained version and updated_at
+# (migration 0007). A page fetches those first with a cheap lookup and answers
+# 304 Not Modified before running its real queries or rendering a template.
+# ETags also cover the viewer, so a cached page is never served to someone else.
+
+TASK_VERSION_QUERY = "SELECT version, updated_at FROM tasks WHERE task_id = %s;"
+TEAM_VERSION_QUERY = "SELECT version, updated_at FROM teams WHERE team_id = %s;"
+
+# Every task assigned to a member, folded into one value
+ASSIGNED_TASKS_VERSION_QUERY = """
+    SELECT
+        md5(COALESCE(string_agg(task_id || '.' || version, ',' ORDER BY task_id), '')) AS version,
+        MAX(updated_at) AS updated_at
+    FROM tasks
+    WHERE assigned_to = %s;
+"""
+
+
+class PageVersion:
+    """Validators (ETag and Last-Modified) of one rendered page."""
+
+    def __init__(self, etag, last_modified):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def not_modified(self):
+        """Returns a 304 response when the client's copy is current, otherwise None."""
+        # A pending flash message must be rendered, so the page is not reused
+        if session.get("_flashes"):
+            return None
+
+        if request.if_none_match:
+            fresh = request.if_none_match.contains_weak(self.etag)
+        elif request.if_modified_since and self.last_modified:
+            fresh = self.last_modified <= request.if_modified_since
+        else:
+            fresh = False
+
+        if not fresh:
+            return None
+        return self.apply(Response(status=304))
+
+    def apply(self, response):
+        """Adds the validators and cache headers to a response."""
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified:
+            response.last_modified = self.last_modified
+        response.headers["Cache-Control"] = "private, no-cache"
+        response.vary.add("Cookie")
+        return response
+
+
+def page_version(cur, page, query, params, *extra):
+    """
+    Looks up the version row of a page; returns a PageVersion, or None when the
+    row does not exist (the view then takes its normal "not found" path).
+    """
+    cur.execute(query, params)
+    row = cur.fetchone()
+    if row is None or row["version"] is None:
+        return None
+
+    viewer = g.current_user
+    parts = [CACHE_VERSION, page, viewer["user_id"], viewer["role"], row["version"], *extra]
+    etag = hashlib.sha1(":".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+    last_modified = row["updated_at"]
+    if last_modified is not None:
+        # Stored as timestamp without time zone in the server's (UTC) clock
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    return PageVersion(etag, last_modified)
+
+
+def with_validators(version, body):
+    """Turns a rendered page into a response carrying the page's validators (if any)."""
+    response = make_response(body)
+    return version.apply(response) if version is not None else response
@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+import uuid
+
+from flask import Response, g, stream_with_context  # type: ignore
+from psycopg2.extras import RealDictCursor  # type: ignore
+from db import get_db_connection, release_db_connection
+from config import EXPORT_BATCH_SIZE
+
+# ---------------------------------------------
+# --- Streaming Exports ---
+# ---------------------------------------------
+# Rows are read through a named (server-side) cursor in batches of
+# EXPORT_BATCH_SIZE and written to the response as they arrive, so worker
+# memory stays constant whatever the size of the export.
+# Each query ends with "{team_filter}", replaced by "WHERE t.team_id = ANY(%s)"
+# for team-scoped exports. stream_with_context keeps the request context (and
+# its teardown) alive until the body is done, so export_response() commits and
+# returns the request's connection before streaming, and the generator borrows
+# (and returns) its own pooled connection.
+
+EXPORT_DATASETS = {
+    "tasks": """
+        SELECT
+            t.task_id,
+            t.team_id,
+            tm.name AS team_name,
+            t.title,
+            t.description,
+            t.status,
+            t.priority,
+            t.due_date,
+            cu.email AS created_by,
+            au.email AS assigned_to,
+            t.created_at,
+            t.updated_at
+        FROM tasks t
+        LEFT JOIN teams tm ON t.team_id = tm.team_id
+        LEFT JOIN users cu ON t.created_by = cu.user_id
+        LEFT JOIN users au ON t.assigned_to = au.user_id
+        {team_filter}
+        ORDER BY t.task_id
+    """,
+    "comments": """
+        SELECT
+            c.comment_id,
+            c.task_id,
+            t.team_id,
+            u.email AS author,
+            c.content,
+            c.created_at
+        FROM comments c
+        JOIN tasks t ON c.task_id = t.task_id
+        LEFT JOIN users u ON c.author_id = u.user_id
+        {team_filter}
+        ORDER BY c.comment_id
+    """,
+    "attachments": """
+        SELECT
+            a.attachment_id,
+            a.task_id,
+            a.comment_id,
+            t.team_id,
+            a.file_name,
+            a.file_path,
+            a.content_hash,
+            a.size_bytes,
+            a.content_type,
+            u.email AS uploaded_by,
+            a.uploaded_at
+        FROM attachments a
+        JOIN tasks t ON a.task_id = t.task_id
+        LEFT JOIN users u ON a.uploaded_by = u.user_id
+        {team_filter}
+        ORDER BY a.attachment_id
+    """,
+}
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+
+def _csv_chunk(rows, columns, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow([row[c] for c in columns])
+    return buffer.getvalue()
+
+
+def _ndjson_chunk(rows):
+    return "".join(json.dumps(row, default=str, ensure_ascii=False) + "\n" for row in rows)
+
+
+def iter_export(dataset, fmt, team_ids=None):
+    """Yields the export as text chunks, one per batch fetched from a server-side cursor."""
+    query = EXPORT_DATASETS[dataset]
+    if team_ids is None:
+        query, params = query.replace("{team_filter}", ""), ()
+    else:
+        query, params = query.replace("{team_filter}", "WHERE t.team_id = ANY(%s)"), (list(team_ids),)
+
+    conn = get_db_connection(dedicated=True)
+    if isinstance(conn, str):
+        raise RuntimeError(f"Database connection failed: {conn}")
+
+    try:
+        cur = conn.cursor(name=f"export_{dataset}_{uuid.uuid4().hex}", cursor_factory=RealDictCursor)
+        cur.execute(query, params)
+        rows = cur.fetchmany(EXPORT_BATCH_SIZE)
+        columns = [d[0] for d in cur.description]
+        if fmt == "csv":
+            yield _csv_chunk(rows, columns, header=True)
+        else:
+            yield _ndjson_chunk(rows)
+
+        while rows:
+            rows = cur.fetchmany(EXPORT_BATCH_SIZE)
+            if rows:
+                yield _csv_chunk(rows, columns) if fmt == "csv" else _ndjson_chunk(rows)
+        cur.close()
+    finally:
+        conn.close()
+
+
+def export_response(dataset, fmt, filename_prefix, team_ids=None):
+    """Builds a streamed download response for one dataset."""
+    # Not idle in a transaction (and out of the pool) while the body streams
+    if "db_conn" in g:
+        g.db_conn.commit()
+    release_db_connection()
+
+    response = Response(
+        stream_with_context(iter_export(dataset, fmt, team_ids)),
+        mimetype=EXPORT_FORMATS[fmt],
+    )
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename_prefix}_{dataset}.{fmt}"'
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,102 @@
+from collections.abc import Sequence
+
+from jinja2 import nodes  # type: ignore
+from jinja2.ext import Extension  # type: ignore
+from psycopg2.extras import RealDictCursor  # type: ignore
+from config import CACHE_VERSION, FRAGMENT_CACHE_SIZE, FRAGMENT_CACHE_TTL, FRAGMENT_MAX_SIZE
+from utils.cache import LRUCache
+
+# ---------------------------------------------
+# --- Rendered Fragment Cache ---
+# ---------------------------------------------
+# Templates wrap expensive blocks in {% cache key %} ... {% endcache %}. The
+# view builds the key from the data versions of migrations 0007 and 0012 (one
+# lookup by primary key or leader_id), so any change to the rows behind a
+# block yields a new key and stale entries simply age out of the LRU. The rows
+# themselves are passed as LazyRows: on a hit the block is not rendered, so
+# they are never queried.
+#
+# The cache holds at most FRAGMENT_CACHE_SIZE blocks of up to FRAGMENT_MAX_SIZE
+# characters each (bigger blocks are rendered every time), for at most FRAGMENT_CACHE_TTL
+# seconds, which also bounds staleness from changes no version tracks.
+
+# Team header/roster version and the version of the team's tasks (migration 0012)
+TEAM_FRAGMENT_VERSION_QUERY = """
+    SELECT version AS team_version, tasks_version
+    FROM teams
+    WHERE team_id = %s;
+"""
+
+# Every team a leader leads, and the tasks of those teams
+LEADER_FRAGMENT_VERSION_QUERY = """
+    SELECT
+        md5(COALESCE(string_agg(team_id || '.' || version, ',' ORDER BY team_id), '')) AS teams_version,
+        md5(COALESCE(string_agg(team_id || '.' || tasks_version, ',' ORDER BY team_id), '')) AS tasks_version
+    FROM teams
+    WHERE leader_id = %(leader_id)s;
+"""
+
+_fragment_cache = LRUCache(FRAGMENT_CACHE_SIZE, ttl=FRAGMENT_CACHE_TTL)
+
+
+def fragment_key(name, *parts):
+    """Cache key of one block; `parts` must include every version the block depends on."""
+    return (CACHE_VERSION, name, *parts)
+
+
+class LazyRows(Sequence):
+    """Result rows fetched on first use, so a template can skip the query on a cache hit."""
+
+    def __init__(self, conn, query, params):
+        self._conn = conn
+        self._query = query
+        self._params = params
+        self._rows = None
+
+    def _load(self):
+        if self._rows is None:
+            cur = self._conn.cursor(cursor_factory=RealDictCursor)
+            try:
+                cur.execute(self._query, self._params)
+                self._rows = cur.fetchall()
+            finally:
+                cur.close()
+        return self._rows
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+    def __len__(self):
+        return len(self._load())
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache key %}...{% endcache %}: renders the body once per key (None disables caching)."""
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_render_cached", args), [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, key, caller):
+        if key is None:
+            return caller()
+        rendered = _fragment_cache.get(key)
+        if rendered is None:
+            rendered = caller()
+            if len(rendered) <= FRAGMENT_MAX_SIZE:
+                _fragment_cache.set(key, rendered)
+        return rendered
+
+
+def fragment_cache_stats():
+    """Returns size and hit/miss counters of this worker's fragment cache."""
+    return _fragment_cache.stats()
+
+
+def init_fragment_cache(app):
+    """Enables the {% cache %} tag in the app's templates."""
+    app.jinja_env.add_extension(FragmentCacheExtension)
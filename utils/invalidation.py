@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import select
+import threading
+
+from psycopg2 import extensions  # type: ignore
+from db import connect
+from config import INVALIDATION_BUS, INVALIDATION_CHANNEL
+
+logger = logging.getLogger("pms.invalidation")
+
+# ---------------------------------------------
+# --- Cross-worker Cache Invalidation Bus ---
+# ---------------------------------------------
+# Writers publish {"kind": ..., "ids": [...]} with pg_notify inside their own
+# transaction, so the event is delivered only if (and when) the change commits.
+# Every worker process runs one listener thread that LISTENs on the channel
+# and hands the ids to the caches subscribed to that kind. The writing worker
+# still evicts its own entries right after committing, so its next request
+# never sees stale data; the bus covers all the other workers.
+# Other modules can add channels to the same connection with listen().
+#
+# Kinds: "team" (header/roster changed), "user" (status/role changed).
+# Task changes need no event: the task fragments are keyed by row versions.
+
+# NOTIFY payloads are limited to 8000 bytes
+MAX_IDS_PER_EVENT = 500
+POLL_INTERVAL = 5                       # seconds between checks of the stop flag
+RECONNECT_DELAY = 5
+
+_subscribers = {}                       # kind -> [(forget(ids), clear())]
+_channels = {}                          # channel -> (handler(payload), on_reconnect())
+
+
+def subscribe(kind, forget, clear):
+    """Registers a cache for one event kind; clear() runs after a reconnect (events may be lost)."""
+    _subscribers.setdefault(kind, []).append((forget, clear))
+
+
+def publish(cur, kind, ids):
+    """Queues an invalidation event on the cursor's transaction; sent on commit."""
+    ids = sorted(set(ids))
+    for start in range(0, len(ids), MAX_IDS_PER_EVENT):
+        payload = json.dumps({"kind": kind, "ids": ids[start:start + MAX_IDS_PER_EVENT]})
+        cur.execute("SELECT pg_notify(%s, %s);", (INVALIDATION_CHANNEL, payload))
+
+
+def dispatch(payload):
+    """Applies one received event to the subscribed caches."""
+    try:
+        event = json.loads(payload)
+        kind, ids = event["kind"], event["ids"]
+    except (ValueError, KeyError, TypeError):
+        logger.warning("ignoring malformed invalidation event: %r", payload)
+        return
+    for forget, _ in _subscribers.get(kind, ()):
+        forget(ids)
+
+
+def clear_all():
+    """Empties every subscribed cache."""
+    for handlers in _subscribers.values():
+        for _, clear in handlers:
+            clear()
+
+
+def listen(channel, handler, on_reconnect=None):
+    """
+    Adds a channel to the worker's LISTEN connection; handler(payload) runs on
+    the listener thread for each notification. Register before the first request.
+    """
+    _channels[channel] = (handler, on_reconnect)
+
+
+class InvalidationListener(threading.Thread):
+    """Daemon thread holding the one LISTEN connection of the current worker process."""
+
+    def __init__(self):
+        super().__init__(name="pms-invalidation-listener", daemon=True)
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = connect()
+                conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cur = conn.cursor()
+                for channel, (_, on_reconnect) in list(_channels.items()):
+                    cur.execute(f"LISTEN {channel};")
+                    # Anything published while we were not listening is lost
+                    if on_reconnect is not None:
+                        on_reconnect()
+                self._listen(conn)
+            except Exception as e:
+                logger.warning("listener disconnected (%s); retrying in %ss", e, RECONNECT_DELAY)
+                self._stop_event.wait(RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _listen(self, conn):
+        while not self._stop_event.is_set():
+            readable, _, _ = select.select([conn], [], [], POLL_INTERVAL)
+            if not readable:
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                handler, _ = _channels.get(notify.channel, (None, None))
+                if handler is not None:
+                    handler(notify.payload)
+
+
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def ensure_listener():
+    """Starts the listener of the current worker process (after fork) if it is not running."""
+    global _listener, _listener_pid
+    if _listener_pid == os.getpid() and _listener.is_alive():
+        return
+    with _listener_lock:
+        if _listener_pid != os.getpid() or not _listener.is_alive():
+            _listener = InvalidationListener()
+            _listener.start()
+            _listener_pid = os.getpid()
+
+
+def start_listener(app):
+    """Starts the listener lazily on the first request handled by each worker process."""
+    if ensure_listener not in app.before_request_funcs.get(None, ()):
+        app.before_request(ensure_listener)
+
+
+def init_invalidation_bus(app):
+    """Subscribes the worker's caches to the invalidation channel."""
+    if INVALIDATION_BUS:
+        listen(INVALIDATION_CHANNEL, dispatch, clear_all)
+        start_listener(app)
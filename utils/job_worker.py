@@ -0,0 +1,183 @@
+"""
+Background job worker.
+
+Usage:
+    python -m utils.job_worker                  # JOB_WORKER_PROCESSES worker processes
+    python -m utils.job_worker --processes 4
+
+Each process holds one connection, claims due jobs with FOR UPDATE SKIP LOCKED
+(utils/jobs.py) and sleeps on LISTEN JOB_CHANNEL while the queue is empty.
+The parent restarts processes that die, requeues jobs left running by them and
+queues the periodic cleanup jobs. SIGTERM/SIGINT let running jobs finish.
+"""
+
+import logging
+import multiprocessing
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+from db import connect
+from config import JOB_CHANNEL, JOB_WORKER_PROCESSES, JOB_POLL_INTERVAL, JOB_CLEANUP_INTERVAL
+from utils.jobs import PRIORITY_LOW, enqueue, claim_job, complete_job, fail_job, requeue_stale_jobs
+from utils.attachment_store import collect_garbage
+from utils.chunked_upload import expire_uploads
+from utils.notifications import record_task_event
+from utils.previews import can_preview, render_preview
+
+logger = logging.getLogger("pms.jobs")
+
+RESTART_DELAY = 5                           # seconds before a failed connection is retried
+
+# Set by SIGTERM/SIGINT. Signal handlers only flip this flag: setting the
+# multiprocessing Event from a handler can deadlock on the Event's own lock.
+_stopping = False
+
+
+def _request_stop(signum, frame):
+    global _stopping
+    _stopping = True
+
+
+def run_task_event(conn, payload):
+    cur = conn.cursor()
+    try:
+        record_task_event(cur, payload["kind"], payload["task_ids"], payload["actor"], payload.get("comment_id"))
+    finally:
+        cur.close()
+
+
+def run_preview(conn, payload):
+    # Timeouts and I/O errors are raised by render_preview(), so they are retried with backoff
+    if not can_preview(payload["content_type"]):
+        raise RuntimeError(f"this worker cannot preview {payload['content_type']}")
+    render_preview(payload["sha256"], payload["content_type"])
+
+
+# kind -> handler(conn, payload); the worker commits after the handler returns
+JOB_HANDLERS = {
+    "task-event": run_task_event,
+    "preview": run_preview,
+    "gc-attachment-blobs": lambda conn, payload: collect_garbage(conn),
+    "expire-uploads": lambda conn, payload: expire_uploads(conn),
+}
+
+# Queued by the parent every JOB_CLEANUP_INTERVAL seconds
+SCHEDULED_JOBS = ("expire-uploads", "gc-attachment-blobs")
+
+
+def run_job(conn, job):
+    """Runs one claimed job and records the outcome; returns True on success."""
+    job_id, kind, payload, attempts, max_attempts = job
+    try:
+        handler = JOB_HANDLERS.get(kind)
+        if handler is None:
+            raise LookupError(f"no handler for job kind {kind!r}")
+        handler(conn, payload)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.warning("job %s (%s) failed on attempt %s/%s: %s", job_id, kind, attempts, max_attempts, e)
+        fail_job(conn, job_id, attempts, max_attempts, f"{type(e).__name__}: {e}")
+        return False
+    complete_job(conn, job_id)
+    return True
+
+
+def work(stop):
+    """Loop of one worker process: run due jobs until `stop` is set."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _request_stop)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def running():
+        return not _stopping and not stop.is_set()
+
+    while running():
+        conn = None
+        try:
+            conn = connect()
+            cur = conn.cursor()
+            cur.execute(f"LISTEN {JOB_CHANNEL};")
+            cur.close()
+            conn.commit()
+            while running():
+                # Cleared before claiming, so a NOTIFY that arrives with the claim's reply is kept
+                conn.notifies.clear()
+                job = claim_job(conn, worker_id)
+                if job is not None:
+                    run_job(conn, job)
+                    continue
+                if conn.notifies:
+                    continue                # queued while we were claiming: claim again
+                # Idle: wait for a NOTIFY from enqueue() or for delayed jobs to come due
+                if select.select([conn], [], [], JOB_POLL_INTERVAL)[0]:
+                    conn.poll()
+        except Exception as e:
+            logger.warning("worker %s lost its connection (%s); retrying in %ss", worker_id, e, RESTART_DELAY)
+            time.sleep(RESTART_DELAY)
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def schedule_cleanup():
+    """Requeues jobs of dead workers and queues the periodic cleanup jobs (once per kind)."""
+    conn = connect()
+    try:
+        requeued = requeue_stale_jobs(conn)
+        if requeued:
+            logger.warning("%s stale job(s) requeued", requeued)
+        cur = conn.cursor()
+        for kind in SCHEDULED_JOBS:
+            enqueue(cur, kind, priority=PRIORITY_LOW, dedupe_key=kind)
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main(argv):
+    processes = JOB_WORKER_PROCESSES
+    if argv[:1] == ["--processes"] and len(argv) == 2 and argv[1].isdigit():
+        processes = int(argv[1])
+    elif argv:
+        print(__doc__)
+        return 2
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    stop = multiprocessing.Event()
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    workers = []
+    next_cleanup = 0
+    while not _stopping:
+        # Keep the pool at full size; a process that died is replaced
+        workers = [w for w in workers if w.is_alive()]
+        while len(workers) < processes:
+            w = multiprocessing.Process(target=work, args=(stop,), name="pms-job-worker", daemon=True)
+            w.start()
+            workers.append(w)
+
+        if time.monotonic() >= next_cleanup:
+            try:
+                schedule_cleanup()
+                next_cleanup = time.monotonic() + JOB_CLEANUP_INTERVAL
+            except Exception as e:
+                logger.warning("could not schedule cleanup jobs (%s); retrying in %ss", e, RESTART_DELAY)
+                next_cleanup = time.monotonic() + RESTART_DELAY
+        time.sleep(1)
+
+    # Workers finish their current job, then exit
+    stop.set()
+    for w in workers:
+        w.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,162 @@
+import json
+import random
+
+from config import JOB_CHANNEL, JOB_MAX_ATTEMPTS, JOB_BACKOFF_BASE, JOB_BACKOFF_MAX, JOB_TIMEOUT
+
+# ---------------------------------------------
+# --- Background Job Queue ---
+# ---------------------------------------------
+# enqueue() adds a job on the caller's transaction: it runs only if the
+# request's changes commit, and a NOTIFY (sent on commit) wakes an idle
+# worker. Workers (utils/job_worker.py) claim the next due job with
+# FOR UPDATE SKIP LOCKED, so concurrent workers never wait on each other or
+# take the same job. The claim is committed before the job runs; a job whose
+# worker dies is requeued after JOB_TIMEOUT. Failures are retried with
+# exponential backoff until max_attempts, then kept as 'failed' (without its
+# dedupe_key, so the same work can be queued again).
+
+PRIORITY_LOW = -10
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 10
+
+
+def enqueue(cur, kind, payload=None, priority=PRIORITY_NORMAL, delay=0, max_attempts=JOB_MAX_ATTEMPTS, dedupe_key=None):
+    """
+    Queues a job on the cursor's transaction; returns its job_id, or None when
+    a job with the same dedupe_key is already waiting or running.
+    """
+    cur.execute("""
+        INSERT INTO jobs (kind, payload, priority, run_at, max_attempts, dedupe_key)
+        VALUES (%s, %s, %s, NOW() + make_interval(secs => %s), %s, %s)
+        ON CONFLICT (dedupe_key) WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'running') DO NOTHING
+        RETURNING job_id;
+    """, (kind, json.dumps(payload or {}), priority, delay, max_attempts, dedupe_key))
+    row = cur.fetchone()
+    if row is None:
+        return None
+    cur.execute("SELECT pg_notify(%s, %s);", (JOB_CHANNEL, kind))
+    return row["job_id"] if isinstance(row, dict) else row[0]
+
+
+def claim_job(conn, worker_id):
+    """Claims and commits the next due job; returns (job_id, kind, payload, attempts, max_attempts) or None."""
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE jobs
+            SET status = 'running', attempts = attempts + 1, locked_at = NOW(), locked_by = %s
+            WHERE job_id = (
+                SELECT job_id FROM jobs
+                WHERE status = 'queued' AND run_at <= NOW()
+                ORDER BY priority DESC, run_at, job_id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING job_id, kind, payload, attempts, max_attempts;
+        """, (worker_id,))
+        job = cur.fetchone()
+        conn.commit()
+        return job
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def backoff_seconds(attempts):
+    """Delay before retry number `attempts`: doubled each time, capped, with up to 10% jitter."""
+    delay = min(JOB_BACKOFF_BASE * 2 ** (attempts - 1), JOB_BACKOFF_MAX)
+    return delay + random.uniform(0, delay / 10)
+
+
+def complete_job(conn, job_id):
+    """Deletes a finished job."""
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM jobs WHERE job_id = %s;", (job_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def fail_job(conn, job_id, attempts, max_attempts, error):
+    """Schedules a retry after backoff, or marks the job failed once it is out of attempts."""
+    cur = conn.cursor()
+    try:
+        if attempts < max_attempts:
+            cur.execute("""
+                UPDATE jobs
+                SET status = 'queued', run_at = NOW() + make_interval(secs => %s),
+                    locked_at = NULL, locked_by = NULL, last_error = %s
+                WHERE job_id = %s;
+            """, (backoff_seconds(attempts), error, job_id))
+        else:
+            cur.execute("""
+                UPDATE jobs
+                SET status = 'failed', locked_at = NULL, locked_by = NULL, last_error = %s, dedupe_key = NULL
+                WHERE job_id = %s;
+            """, (error, job_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def requeue_stale_jobs(conn, timeout=JOB_TIMEOUT):
+    """Returns running jobs older than `timeout` seconds (their worker died) to the queue; returns how many."""
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE jobs
+            SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                dedupe_key = CASE WHEN attempts < max_attempts THEN dedupe_key END,
+                locked_at = NULL, locked_by = NULL, last_error = 'worker timed out'
+            WHERE status = 'running' AND locked_at < NOW() - make_interval(secs => %s);
+        """, (timeout,))
+        requeued = cur.rowcount
+        conn.commit()
+        return requeued
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def retry_failed_jobs(conn):
+    """Queues every failed job again with a fresh set of attempts; returns how many."""
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE jobs
+            SET status = 'queued', attempts = 0, run_at = NOW()
+            WHERE status = 'failed';
+        """)
+        retried = cur.rowcount
+        conn.commit()
+        return retried
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def job_stats(cur):
+    """{status: count} plus the age in seconds of the oldest due job (`cur` is a RealDictCursor)."""
+    cur.execute("""
+        SELECT
+            COUNT(*) FILTER (WHERE status = 'queued') AS queued,
+            COUNT(*) FILTER (WHERE status = 'running') AS running,
+            COUNT(*) FILTER (WHERE status = 'failed') AS failed,
+            COALESCE(EXTRACT(EPOCH FROM NOW() - MIN(run_at) FILTER (WHERE status = 'queued' AND run_at <= NOW())), 0)::int
+                AS oldest_due_seconds
+        FROM jobs;
+    """)
+    return cur.fetchone()
@@ -0,0 +1,83 @@
+"""
+Database maintenance commands.
+
+Usage:
+    python -m utils.maintenance repair-member-counts       # recompute teams.member_count
+    python -m utils.maintenance repair-unread-counts       # recompute notification_cursors.unread_count
+    python -m utils.maintenance store-legacy-attachments   # move pre-0009 uploads into the blob store
+    python -m utils.maintenance gc-attachment-blobs        # delete blobs no attachment references
+    python -m utils.maintenance expire-uploads             # delete chunked uploads abandoned for UPLOAD_EXPIRY_HOURS
+    python -m utils.maintenance build-previews             # make missing attachment previews
+    python -m utils.maintenance retry-failed-jobs          # queue failed background jobs again
+"""
+
+import sys
+
+from db import get_db_connection
+from utils.attachment_store import store_legacy_attachments, collect_garbage
+from utils.chunked_upload import expire_uploads
+from utils.previews import build_previews
+from utils.jobs import retry_failed_jobs
+
+
+def repair_member_counts(conn):
+    """Recomputes teams.member_count from team_members; returns the number of teams corrected."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT repair_team_member_counts();")
+        fixed = cur.fetchone()[0]
+        conn.commit()
+        return fixed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def repair_unread_counts(conn):
+    """Recomputes notification_cursors.unread_count; returns the number of users corrected."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT repair_notification_unread_counts();")
+        fixed = cur.fetchone()[0]
+        conn.commit()
+        return fixed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+COMMANDS = {
+    "repair-member-counts": (repair_member_counts, "team member count(s) corrected."),
+    "repair-unread-counts": (repair_unread_counts, "unread notification count(s) corrected."),
+    "store-legacy-attachments": (store_legacy_attachments, "attachment(s) moved into the blob store."),
+    "gc-attachment-blobs": (collect_garbage, "unreferenced blob(s) deleted."),
+    "expire-uploads": (expire_uploads, "abandoned upload(s) deleted."),
+    "build-previews": (build_previews, "attachment preview(s) made."),
+    "retry-failed-jobs": (retry_failed_jobs, "failed job(s) queued again."),
+}
+
+
+def main(argv):
+    if not argv or argv[0] not in COMMANDS:
+        print(__doc__)
+        return 2
+
+    conn = get_db_connection()
+    if isinstance(conn, str):
+        print(f"Database connection failed: {conn}")
+        return 1
+
+    command, message = COMMANDS[argv[0]]
+    try:
+        print(f"{command(conn)} {message}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
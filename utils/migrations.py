@@ -0,0 +1,259 @@
+"""
+Forward-only schema migrations.
+
+Migrations are plain SQL files in database_sql/migrations named
+<version>_<name>.sql (e.g. 0001_task_indexes.sql). Each file runs once, in
+its own transaction, and is recorded in schema_migrations with a checksum so
+an already applied file cannot be edited silently.
+
+A migration may declare EXPLAIN checks for the access paths it serves:
+
+    -- explain: idx_tasks_assigned_due
+    --   SELECT task_id FROM tasks WHERE assigned_to = 1 ORDER BY due_date;
+
+The check passes when the planner (with sequential scans disabled, so tiny
+tables do not hide the index) uses the named index for that query. Checks of
+indexes dropped by a later migration are reported as superseded.
+
+Usage:
+    python -m utils.migrations            # apply pending migrations and run checks
+    python -m utils.migrations status     # list applied / pending migrations
+    python -m utils.migrations check      # only run the EXPLAIN checks
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+
+from db import get_db_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database_sql", "migrations")
+MIGRATION_FILE_RE = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+ADVISORY_LOCK_ID = 513_0001
+
+
+class MigrationError(Exception):
+    """Raised when the migration history and the files on disk disagree."""
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    def explain_checks(self):
+        """Returns (index_name, query) pairs declared with '-- explain:' directives."""
+        checks = []
+        lines = self.sql.splitlines()
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            if line.startswith("-- explain:"):
+                index_name = line.split(":", 1)[1].strip()
+                query_lines = []
+                i += 1
+                while i < len(lines) and lines[i].strip().startswith("--") and not lines[i].strip().startswith("-- explain:"):
+                    text = lines[i].strip()[2:].strip()
+                    if not text:
+                        break
+                    query_lines.append(text)
+                    i += 1
+                checks.append((index_name, " ".join(query_lines)))
+                continue
+            i += 1
+        return checks
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Returns the migrations on disk ordered by version."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError("Duplicate migration version in " + directory)
+    return sorted(migrations, key=lambda m: m.version)
+
+
+def ensure_migrations_table(conn):
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version integer PRIMARY KEY,
+            name text NOT NULL,
+            checksum text NOT NULL,
+            applied_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    conn.commit()
+    cur.close()
+
+
+def applied_migrations(conn):
+    """Returns {version: checksum} of migrations already applied."""
+    cur = conn.cursor()
+    cur.execute("SELECT version, checksum FROM schema_migrations ORDER BY version;")
+    applied = dict(cur.fetchall())
+    cur.close()
+    return applied
+
+
+def pending_migrations(conn, migrations):
+    """Verifies the recorded history and returns the migrations still to apply."""
+    applied = applied_migrations(conn)
+    known = {m.version: m for m in migrations}
+
+    for version, checksum in applied.items():
+        if version not in known:
+            raise MigrationError(f"Migration {version:04d} is recorded in the database but missing on disk.")
+        if known[version].checksum != checksum:
+            raise MigrationError(f"Migration {version:04d}_{known[version].name} was modified after being applied.")
+
+    pending = [m for m in migrations if m.version not in applied]
+    if applied and pending and pending[0].version < max(applied):
+        raise MigrationError(f"Migration {pending[0].version:04d} is older than the latest applied one; add a new version instead.")
+    return pending
+
+
+def apply_migration(conn, migration):
+    cur = conn.cursor()
+    try:
+        cur.execute(migration.sql)
+        cur.execute("""
+            INSERT INTO schema_migrations (version, name, checksum)
+            VALUES (%s, %s, %s);
+        """, (migration.version, migration.name, migration.checksum))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _index_names(plan):
+    names = set()
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            names.add(plan["Index Name"])
+        for value in plan.values():
+            names |= _index_names(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            names |= _index_names(item)
+    return names
+
+
+def run_explain_check(conn, index_name, query):
+    """Returns True when the planner uses `index_name` for `query`."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SET LOCAL enable_seqscan = off;")
+        cur.execute("EXPLAIN (FORMAT JSON) " + query)
+        plan = cur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return index_name in _index_names(plan)
+    finally:
+        conn.rollback()
+        cur.close()
+
+
+def index_exists(conn, index_name):
+    cur = conn.cursor()
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (index_name,))
+    exists = cur.fetchone()[0]
+    cur.close()
+    return exists
+
+
+def run_checks(conn, migrations):
+    """Runs every EXPLAIN check of the applied migrations; returns the number of failures."""
+    applied = applied_migrations(conn)
+    failures = 0
+    for migration in migrations:
+        if migration.version not in applied:
+            continue
+        for index_name, query in migration.explain_checks():
+            if not index_exists(conn, index_name):
+                print(f"  [SKIP] {migration.version:04d}: {index_name} (superseded by a later migration)")
+                continue
+            try:
+                ok = run_explain_check(conn, index_name, query)
+            except Exception as e:
+                print(f"  [FAIL] {migration.version:04d}: {index_name} ({e})")
+                failures += 1
+                continue
+            print(f"  [{'OK' if ok else 'FAIL'}] {migration.version:04d}: {index_name}")
+            if not ok:
+                failures += 1
+    return failures
+
+
+def migrate(conn, migrations):
+    """Applies pending migrations under an advisory lock; returns the list applied."""
+    cur = conn.cursor()
+    cur.execute("SELECT pg_advisory_lock(%s);", (ADVISORY_LOCK_ID,))
+    conn.commit()
+    try:
+        ensure_migrations_table(conn)
+        pending = pending_migrations(conn, migrations)
+        for migration in pending:
+            print(f"Applying migration {migration.version:04d}_{migration.name} ...")
+            apply_migration(conn, migration)
+        return pending
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(%s);", (ADVISORY_LOCK_ID,))
+        conn.commit()
+        cur.close()
+
+
+def main(argv):
+    command = argv[0] if argv else "migrate"
+    if command not in ("migrate", "status", "check"):
+        print(__doc__)
+        return 2
+
+    conn = get_db_connection()
+    if isinstance(conn, str):
+        print(f"Database connection failed: {conn}")
+        return 1
+
+    try:
+        migrations = load_migrations()
+
+        if command == "status":
+            ensure_migrations_table(conn)
+            applied = applied_migrations(conn)
+            for m in migrations:
+                print(f"  [{'applied' if m.version in applied else 'pending'}] {m.version:04d}_{m.name}")
+            return 0
+
+        if command == "migrate":
+            applied = migrate(conn, migrations)
+            print(f"{len(applied)} migration(s) applied.")
+
+        print("Running EXPLAIN checks...")
+        failures = run_checks(conn, migrations)
+        if failures:
+            print(f"{failures} EXPLAIN check(s) failed.")
+            return 1
+        return 0
+    except MigrationError as e:
+        print(f"Migration error: {e}")
+        return 1
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
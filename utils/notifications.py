@@ -0,0 +1,120 @@
+from config import NOTIFICATIONS_COMMIT_LAG, NOTIFICATIONS_PAGE_SIZE
+from utils.realtime import TASK_EVENT_RECIPIENTS, publish_task_event
+from utils.jobs import PRIORITY_HIGH, enqueue
+
+# ---------------------------------------------
+# --- Notifications (fan-out on write) ---
+# ---------------------------------------------
+# A comment, assignment or status change writes one notifications row per
+# recipient in the writer's transaction (the same recipients as the live
+# events). Each user has a cursor (notification_cursors: last_seen_id and a
+# trigger-maintained unread_count), so the unread badge is a primary-key
+# lookup and "since cursor" reads use idx_notifications_user_id (migration 0008).
+# Events of many tasks at once (batch updates) are fanned out by a job worker
+# instead, through queue_task_event().
+#
+# Ids are taken when a row is inserted, not when its transaction commits, so a
+# fan-out that commits late (a job worker next to the request's own fan-out)
+# can become visible below ids a poller has already seen. A `since` read
+# therefore also returns the rows of the last NOTIFICATIONS_COMMIT_LAG seconds
+# below `since`; pollers skip the ids they have already shown.
+
+
+def record_task_event(cur, kind, task_ids, actor, comment_id=None):
+    """Writes the notifications of a task event and queues its live event; sent on commit."""
+    if not task_ids:
+        return
+    recipients = ", ".join(f"t.{column}" for column in TASK_EVENT_RECIPIENTS[kind])
+    cur.execute(f"""
+        INSERT INTO notifications (user_id, kind, task_id, comment_id, actor_id, status)
+        SELECT DISTINCT r.user_id, %(kind)s, t.task_id, %(comment_id)s::integer, %(actor_id)s, t.status
+        FROM tasks t
+        CROSS JOIN LATERAL unnest(ARRAY[{recipients}]) AS r(user_id)
+        WHERE t.task_id = ANY(%(task_ids)s)
+          AND r.user_id IS NOT NULL
+          AND r.user_id <> %(actor_id)s;
+    """, {"kind": kind, "task_ids": list(task_ids), "comment_id": comment_id, "actor_id": actor["user_id"]})
+    publish_task_event(cur, kind, task_ids, actor)
+
+
+def queue_task_event(cur, kind, task_ids, actor, comment_id=None):
+    """Like record_task_event(), but the fan-out runs in a "task-event" job after commit."""
+    if not task_ids:
+        return None
+    return enqueue(cur, "task-event", {
+        "kind": kind,
+        "task_ids": list(task_ids),
+        "actor": {"user_id": actor["user_id"], "username": actor["username"]},
+        "comment_id": comment_id,
+    }, priority=PRIORITY_HIGH)
+
+
+def notification_cursor(cur, user_id):
+    """Returns {last_seen_id, unread_count} of a user (`cur` is a RealDictCursor)."""
+    cur.execute("SELECT last_seen_id, unread_count FROM notification_cursors WHERE user_id = %s;", (user_id,))
+    return cur.fetchone() or {"last_seen_id": 0, "unread_count": 0}
+
+
+def fetch_notifications(cur, user_id, last_seen_id, since=None, limit=NOTIFICATIONS_PAGE_SIZE):
+    """Returns the user's newest notifications (only those after `since` when given), newest first.
+
+    With `since`, the notifications of the last NOTIFICATIONS_COMMIT_LAG seconds are returned
+    again, so callers must ignore the ids they already have.
+    """
+    cur.execute("""
+        SELECT
+            n.notification_id,
+            n.kind,
+            n.task_id,
+            t.title AS task_title,
+            n.status,
+            c.content,
+            u.username AS actor,
+            n.created_at,
+            n.notification_id > %(last_seen_id)s AS unread
+        FROM notifications n
+        JOIN tasks t ON t.task_id = n.task_id
+        LEFT JOIN comments c ON c.comment_id = n.comment_id
+        LEFT JOIN users u ON u.user_id = n.actor_id
+        WHERE n.user_id = %(user_id)s
+          AND n.notification_id > (
+              -- The newest notification up to `since` that is older than the commit lag
+              SELECT COALESCE(MAX(o.notification_id), 0)
+              FROM notifications o
+              WHERE o.user_id = %(user_id)s
+                AND o.notification_id <= %(since)s
+                AND o.created_at <= NOW() - make_interval(secs => %(lag)s)
+          )
+        ORDER BY n.notification_id DESC
+        LIMIT %(limit)s;
+    """, {"user_id": user_id, "last_seen_id": last_seen_id, "since": since or 0,
+          "lag": NOTIFICATIONS_COMMIT_LAG, "limit": limit})
+    return cur.fetchall()
+
+
+def mark_notifications_seen(cur, user_id, upto_id):
+    """Moves the user's cursor forward to `upto_id` and recounts what is still unread."""
+    # The row lock makes the recount below see every notification committed before it
+    cur.execute("SELECT 1 FROM notification_cursors WHERE user_id = %s FOR UPDATE;", (user_id,))
+    cur.execute("""
+        UPDATE notification_cursors
+        SET last_seen_id = %(upto_id)s,
+            unread_count = (
+                SELECT COUNT(*) FROM notifications
+                WHERE user_id = %(user_id)s AND notification_id > %(upto_id)s
+            )
+        WHERE user_id = %(user_id)s AND last_seen_id < %(upto_id)s;
+    """, {"user_id": user_id, "upto_id": upto_id})
+
+
+def notifications_json(cur, user_id, since=None):
+    """Payload of the JSON notification endpoints."""
+    cursor = notification_cursor(cur, user_id)
+    notifications = fetch_notifications(cur, user_id, cursor["last_seen_id"], since)
+    for notification in notifications:
+        notification["created_at"] = notification["created_at"].isoformat()
+    return {
+        "notifications": notifications,
+        "unread": cursor["unread_count"],
+        "last_seen_id": cursor["last_seen_id"],
+    }
@@ -0,0 +1,128 @@
+import base64
+import json
+
+import psycopg2  # type: ignore
+from flask import request, url_for  # type: ignore
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+
+# ---------------------------------------------
+# --- Keyset (cursor) Pagination ---
+# ---------------------------------------------
+# Pages are addressed by the sort key of the last row shown, not by OFFSET,
+# so page N costs the same as page 1. Sort keys must be NOT NULL and end with
+# a unique column (e.g. the primary key) so the order is stable.
+#
+# Cursors come from the query string, so a tampered or truncated one is
+# ignored and the first page is shown instead of an error.
+
+CURSOR_VALUE_TYPES = (str, int, float)
+
+def encode_cursor(values):
+    """Encodes the sort-key values of a row into an opaque URL-safe token."""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, size):
+    """Decodes a cursor token; returns None when it is missing or malformed."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    if not all(isinstance(value, CURSOR_VALUE_TYPES) and not isinstance(value, bool) for value in values):
+        return None
+    return values
+
+
+def page_args(cursor_arg="after"):
+    """Reads (page_size, cursor token) from the query string, clamping the page size."""
+    try:
+        page_size = int(request.args.get("per_page", PAGE_SIZE_DEFAULT))
+    except ValueError:
+        page_size = PAGE_SIZE_DEFAULT
+    page_size = max(1, min(page_size, PAGE_SIZE_MAX))
+    return page_size, request.args.get(cursor_arg)
+
+
+class KeysetPage:
+    """One page of rows plus the cursor of the next page."""
+
+    def __init__(self, items, page_size, after, next_cursor, cursor_arg):
+        self.items = items
+        self.page_size = page_size
+        self.after = after
+        self.next_cursor = next_cursor
+        self.cursor_arg = cursor_arg
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return not self.after
+
+    def _url(self, cursor):
+        args = request.args.to_dict()
+        args.pop(self.cursor_arg, None)
+        if cursor:
+            args[self.cursor_arg] = cursor
+        args["per_page"] = self.page_size
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    def next_url(self):
+        return self._url(self.next_cursor) if self.next_cursor else None
+
+    def first_url(self):
+        return self._url(None)
+
+
+def keyset_paginate(cur, query, params, sort_keys, page_size, after=None, descending=False, cursor_arg="after"):
+    """
+    Runs `query` for one page and returns a KeysetPage.
+
+    query     -- SELECT ... containing a "{keyset}" placeholder as the last condition of its
+                 WHERE clause (e.g. "WHERE t.assigned_to = %s AND {keyset}"); ORDER BY / LIMIT
+                 are appended, so `params` must only cover placeholders before {keyset}.
+    sort_keys -- [(sql_expression, result_column), ...] in ORDER BY order.
+    after     -- cursor token of the previous page (None for the first page).
+    """
+    expressions = [expr for expr, _ in sort_keys]
+    columns = [column for _, column in sort_keys]
+    direction = "DESC" if descending else "ASC"
+
+    order_by = " ORDER BY " + ", ".join(f"{expr} {direction}" for expr in expressions) + " LIMIT %s"
+
+    cursor_values = decode_cursor(after, len(sort_keys))
+    rows = None
+    if cursor_values is not None:
+        placeholders = ", ".join(["%s"] * len(cursor_values))
+        condition = f"({', '.join(expressions)}) {'<' if descending else '>'} ({placeholders})"
+        # Values of the wrong type for a sort key (e.g. text for a date) fail in
+        # the database; the savepoint keeps the caller's transaction usable.
+        cur.execute("SAVEPOINT keyset_cursor;")
+        try:
+            cur.execute(query.replace("{keyset}", condition) + order_by,
+                        list(params) + cursor_values + [page_size + 1])
+            rows = cur.fetchall()
+            cur.execute("RELEASE SAVEPOINT keyset_cursor;")
+        except (psycopg2.DataError, psycopg2.ProgrammingError):
+            cur.execute("ROLLBACK TO SAVEPOINT keyset_cursor;")
+            cursor_values = None
+
+    if cursor_values is None:
+        cur.execute(query.replace("{keyset}", "TRUE") + order_by, list(params) + [page_size + 1])
+        rows = cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([rows[-1][column] for column in columns])
+
+    return KeysetPage(rows, page_size, after if cursor_values is not None else None, next_cursor, cursor_arg)
@@ -0,0 +1,173 @@
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+from flask import Response, send_file  # type: ignore
+from config import PREVIEW_ENABLED, PREVIEW_SIZE, PREVIEW_TIMEOUT
+from utils.attachment_store import blob_path, preview_path, NO_PREVIEW_SUFFIX
+from utils.jobs import enqueue
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError  # type: ignore
+except ImportError:                         # optional: no image previews
+    Image = None
+
+# ---------------------------------------------
+# --- Attachment Previews ---
+# ---------------------------------------------
+# Small JPEG previews of image attachments and of the first page of PDFs, so
+# the task views do not load full-size originals. They are made per blob
+# (identical files share one preview) by the job workers, never inside the
+# request: queue_preview() queues a "preview" job with the upload, and again
+# from the preview routes when a preview is missing (older uploads).
+# A blob that cannot be previewed (not a decodable image, or pdftoppm rejects
+# it) gets an empty ".none" marker so it is not retried. Timeouts and I/O
+# errors are raised instead, so the job queue retries them with backoff.
+# `python -m utils.maintenance build-previews` fills in the rest.
+
+logger = logging.getLogger("pms.previews")
+
+IMAGE_CONTENT_TYPES = {"image/png", "image/jpeg", "image/gif"}
+PDF_CONTENT_TYPE = "application/pdf"
+PREVIEW_QUALITY = 80
+PREVIEW_MAX_AGE = 86400
+PDFTOPPM = shutil.which("pdftoppm")
+
+# Errors meaning the file itself cannot be previewed; anything else may pass on a retry
+UNPREVIEWABLE_ERRORS = (subprocess.CalledProcessError,)
+if Image is not None:
+    UNPREVIEWABLE_ERRORS += (UnidentifiedImageError, Image.DecompressionBombError)
+
+def can_preview(content_type):
+    """True if a preview can be made for this content type with the installed tools."""
+    if not PREVIEW_ENABLED:
+        return False
+    if content_type in IMAGE_CONTENT_TYPES:
+        return Image is not None
+    return content_type == PDF_CONTENT_TYPE and PDFTOPPM is not None
+
+
+def previewable(attachment):
+    """Template helper: whether to show a preview for an attachment row."""
+    return bool(attachment.get("content_hash")) and can_preview(attachment.get("content_type"))
+
+
+def _render_image(source, target):
+    with Image.open(source) as img:
+        img.draft("RGB", (PREVIEW_SIZE, PREVIEW_SIZE))      # JPEG: decode at reduced scale
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE))
+        if img.mode in ("RGBA", "LA", "P"):
+            # Transparent areas on white, as the page shows them
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, "white")
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        img.convert("RGB").save(target, "JPEG", quality=PREVIEW_QUALITY, optimize=True)
+
+
+def _render_pdf(source, target):
+    # pdftoppm appends the extension to the output prefix
+    subprocess.run(
+        [PDFTOPPM, "-jpeg", "-jpegopt", f"quality={PREVIEW_QUALITY}", "-f", "1", "-l", "1",
+         "-singlefile", "-scale-to", str(PREVIEW_SIZE), source, target[:-len(".jpg")]],
+        check=True, timeout=PREVIEW_TIMEOUT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+
+
+def render_preview(sha256, content_type):
+    """
+    Writes the preview of a blob (or its "no preview" marker); returns True if
+    a preview was made. Timeouts and I/O errors are raised, without a marker.
+    """
+    source = blob_path(sha256)
+    if not os.path.exists(source):
+        return False                        # blob collected meanwhile
+    target = preview_path(sha256)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".jpg")
+    os.close(fd)
+    try:
+        if content_type == PDF_CONTENT_TYPE:
+            _render_pdf(source, tmp)
+        else:
+            _render_image(source, tmp)
+        os.replace(tmp, target)
+        return True
+    except UNPREVIEWABLE_ERRORS as e:
+        logger.warning("no preview for %s (%s): %s", sha256, content_type, e)
+        open(preview_path(sha256, NO_PREVIEW_SUFFIX), "w").close()
+        return False
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def preview_state(sha256):
+    """"ready", "none" (cannot be previewed) or "missing"."""
+    if os.path.exists(preview_path(sha256)):
+        return "ready"
+    if os.path.exists(preview_path(sha256, NO_PREVIEW_SUFFIX)):
+        return "none"
+    return "missing"
+
+
+def queue_preview(cur, sha256, content_type):
+    """Queues the preview of a blob on the cursor's transaction unless it exists, is queued or cannot be made."""
+    if not sha256 or not can_preview(content_type) or preview_state(sha256) != "missing":
+        return None
+    return enqueue(cur, "preview", {"sha256": sha256, "content_type": content_type}, dedupe_key=f"preview:{sha256}")
+
+
+def send_preview(cur, attachment):
+    """
+    Response with the preview of an authorized attachment. While it is being
+    made (or if there is none) the answer is an uncached 404, which the
+    page's <img> hides; a missing preview is queued on `cur`'s transaction.
+    """
+    sha256 = attachment["content_hash"]
+    if sha256 and preview_state(sha256) == "ready":
+        response = send_file(
+            os.path.abspath(preview_path(sha256)),
+            mimetype="image/jpeg",
+            conditional=True,
+            etag=f"{sha256}-{PREVIEW_SIZE}",
+            max_age=PREVIEW_MAX_AGE,
+        )
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
+
+    if previewable(attachment):
+        queue_preview(cur, sha256, attachment["content_type"])
+    return Response(status=404, headers={"Cache-Control": "no-store"})
+
+
+def build_previews(conn):
+    """
+    Makes the missing previews of all stored blobs in this process. Returns how
+    many were made; blobs that fail for a transient reason are logged and left missing.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT sha256, content_type FROM attachment_blobs WHERE ref_count > 0 ORDER BY created_at;")
+        blobs = cur.fetchall()
+        conn.commit()
+    finally:
+        cur.close()
+    made = 0
+    for sha256, content_type in blobs:
+        if not can_preview(content_type) or preview_state(sha256) != "missing":
+            continue
+        try:
+            made += render_preview(sha256, content_type)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning("preview of %s (%s) failed, left for a later run: %s", sha256, content_type, e)
+    return made
+
+
+def init_previews(app):
+    """Makes previewable() available to templates."""
+    app.jinja_env.globals["previewable"] = previewable
@@ -0,0 +1,208 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from flask import Response, jsonify  # type: ignore
+from config import (
+    SSE_ENABLED, SSE_CHANNEL, SSE_MAX_CLIENTS, SSE_HEARTBEAT, SSE_MAX_STREAM_SECONDS, SSE_QUEUE_SIZE,
+    LIVE_EVENTS_POLL_INTERVAL,
+)
+from utils.invalidation import listen, start_listener
+
+try:
+    from gevent import monkey as gevent_monkey  # type: ignore
+except ImportError:                         # optional: without it pages poll instead
+    gevent_monkey = None
+
+logger = logging.getLogger("pms.realtime")
+
+# ---------------------------------------------
+# --- Real-time Events (Server-Sent Events) ---
+# ---------------------------------------------
+# Writers queue {"type", "users", ...} with pg_notify inside their transaction,
+# so nothing is pushed for a change that rolls back. Each worker receives the
+# events on the listener thread it already runs for cache invalidation (one
+# LISTEN connection per process, none per client) and fans them out to the
+# in-memory mailboxes of the open streams of the addressed users.
+#
+# A stream holds no database connection. It sends a keep-alive comment every
+# SSE_HEARTBEAT seconds (which also detects closed clients) and ends after
+# SSE_MAX_STREAM_SECONDS; EventSource reconnects on its own.
+#
+# Streams are only served by gevent workers (gunicorn.conf.py), where an open
+# stream is a parked greenlet rather than a blocked thread. On a sync or
+# threaded server the events routes answer 204, which stops EventSource, and
+# the pages poll the JSON notifications endpoint every LIVE_EVENTS_POLL_INTERVAL
+# seconds instead.
+#
+# Types: "comment" (new comment on a task), "assignment" (task assigned to
+#        the user), "status" (task status changed)
+
+# Which task columns receive each event type (the actor is always skipped)
+TASK_EVENT_RECIPIENTS = {
+    "comment": ("assigned_to", "created_by"),
+    "assignment": ("assigned_to",),
+    "status": ("assigned_to", "created_by"),
+}
+RETRY_MS = 5000
+
+
+def publish_task_event(cur, event_type, task_ids, actor):
+    """Queues one event per task on the cursor's transaction; sent on commit."""
+    if not SSE_ENABLED or not task_ids:
+        return
+    recipients = ", ".join(f"t.{column}" for column in TASK_EVENT_RECIPIENTS[event_type])
+    cur.execute(f"""
+        SELECT pg_notify(%(channel)s, json_build_object(
+            'type', %(type)s,
+            'users', r.users,
+            'task_id', t.task_id,
+            'title', t.title,
+            'status', t.status,
+            'actor', %(actor_name)s
+        )::text)
+        FROM tasks t
+        CROSS JOIN LATERAL (
+            SELECT array_agg(DISTINCT u) AS users
+            FROM unnest(ARRAY[{recipients}]) AS u
+            WHERE u IS NOT NULL AND u <> %(actor_id)s
+        ) r
+        WHERE t.task_id = ANY(%(task_ids)s) AND r.users IS NOT NULL;
+    """, {
+        "channel": SSE_CHANNEL,
+        "type": event_type,
+        "task_ids": list(task_ids),
+        "actor_id": actor["user_id"],
+        "actor_name": actor["username"],
+    })
+
+
+class EventStream:
+    """Mailbox of one open connection; the listener thread fills it, the response drains it."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._events = deque(maxlen=SSE_QUEUE_SIZE)     # oldest events are dropped for slow clients
+        self._ready = threading.Condition()
+
+    def put(self, event):
+        with self._ready:
+            self._events.append(event)
+            self._ready.notify()
+
+    def wait(self, timeout):
+        """Returns the pending events, blocking up to `timeout` seconds while there are none."""
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+
+class EventBroker:
+    """Open streams of this worker process, by user."""
+
+    def __init__(self, max_clients):
+        self.max_clients = max_clients
+        self._streams = {}                              # user_id -> set(EventStream)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def connect(self, user_id):
+        """Registers a new stream; None when the worker already serves max_clients."""
+        with self._lock:
+            if self._count >= self.max_clients:
+                return None
+            stream = EventStream(user_id)
+            self._streams.setdefault(user_id, set()).add(stream)
+            self._count += 1
+            return stream
+
+    def disconnect(self, stream):
+        with self._lock:
+            streams = self._streams.get(stream.user_id)
+            if streams is not None and stream in streams:
+                streams.discard(stream)
+                self._count -= 1
+                if not streams:
+                    del self._streams[stream.user_id]
+
+    def deliver(self, payload):
+        """Hands one NOTIFY payload to the streams of its users."""
+        try:
+            event = json.loads(payload)
+            user_ids = event.pop("users")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.warning("ignoring malformed event: %r", payload)
+            return
+        with self._lock:
+            streams = [stream for user_id in user_ids for stream in self._streams.get(user_id, ())]
+        for stream in streams:
+            stream.put(event)
+
+    def stats(self):
+        with self._lock:
+            return {"streams": self._count, "users": len(self._streams), "max_clients": self.max_clients}
+
+
+_broker = EventBroker(SSE_MAX_CLIENTS)
+
+
+def _format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def _iter_stream(stream):
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            events = stream.wait(SSE_HEARTBEAT)
+            if not events:
+                yield ": keep-alive\n\n"
+            for event in events:
+                yield _format_event(event)
+    finally:
+        _broker.disconnect(stream)
+
+
+def streaming_supported():
+    """True when this worker is cooperative (gevent), so an open stream does not hold a thread."""
+    return SSE_ENABLED and gevent_monkey is not None and gevent_monkey.is_module_patched("socket")
+
+
+def event_stream_response(user_id):
+    """Returns a text/event-stream response pushing the user's events (204 where streams are not served)."""
+    if not SSE_ENABLED:
+        return jsonify({"error": "Real-time events are disabled."}), 404
+    if not streaming_supported():
+        return Response(status=204)
+    stream = _broker.connect(user_id)
+    if stream is None:
+        response = jsonify({"error": "Too many open event streams, try again later."})
+        response.headers["Retry-After"] = str(RETRY_MS // 1000)
+        return response, 503
+
+    # The generator never touches the request or the database, so the request
+    # context (and its pooled connection) is released before streaming starts.
+    return Response(_iter_stream(stream), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
+def realtime_stats():
+    """Returns the open stream counts of this worker."""
+    return _broker.stats()
+
+
+def init_realtime(app):
+    """Subscribes this worker to the events channel; templates ask live_events_streaming() which mode to use."""
+    app.jinja_env.globals["live_events_streaming"] = streaming_supported
+    app.jinja_env.globals["live_events_poll_interval"] = LIVE_EVENTS_POLL_INTERVAL
+    if SSE_ENABLED:
+        listen(SSE_CHANNEL, _broker.deliver)
+        start_listener(app)
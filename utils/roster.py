@@ -0,0 +1,87 @@
+import re
+
+from utils.invalidation import publish
+
+# ---------------------------------------------
+# --- Team Roster Sync ---
+# ---------------------------------------------
+# Replaces the members of a team with a full list of emails. The diff against
+# team_members is computed in SQL and applied with one statement (a DELETE and
+# an INSERT in data-modifying CTEs) inside a single transaction.
+
+ROSTER_MAX_EMAILS = 1000
+_EMAIL_SEPARATORS_RE = re.compile(r"[\s,;]+")
+
+
+class RosterSyncError(Exception):
+    """Raised when a roster cannot be applied; the message is shown to the user."""
+
+
+def parse_roster(text):
+    """Splits a newline/comma/semicolon separated list into unique emails (order kept)."""
+    emails = []
+    seen = set()
+    for email in _EMAIL_SEPARATORS_RE.split(text or ""):
+        if email and email not in seen:
+            seen.add(email)
+            emails.append(email)
+    return emails
+
+
+def sync_team_roster(conn, team_id, leader_id, emails):
+    """
+    Makes `emails` the exact member list of a team led by `leader_id`.
+    Returns (added, removed) counts; raises RosterSyncError without changing
+    anything when the team is not the leader's or an email is unknown.
+    """
+    if not emails:
+        raise RosterSyncError("The roster must contain at least one email.")
+    if len(emails) > ROSTER_MAX_EMAILS:
+        raise RosterSyncError(f"A roster can list at most {ROSTER_MAX_EMAILS} emails.")
+
+    cur = conn.cursor()
+    try:
+        # Locks the team so concurrent syncs of the same roster run one after the other
+        cur.execute("SELECT 1 FROM teams WHERE team_id = %s AND leader_id = %s FOR UPDATE;", (team_id, leader_id))
+        if cur.fetchone() is None:
+            raise RosterSyncError("Unauthorized or team not found.")
+
+        cur.execute("""
+            SELECT e.email
+            FROM unnest(%s::text[]) WITH ORDINALITY AS e(email, position)
+            LEFT JOIN users u ON u.email = e.email
+            WHERE u.user_id IS NULL
+            ORDER BY e.position;
+        """, (emails,))
+        unknown = [row[0] for row in cur.fetchall()]
+        if unknown:
+            raise RosterSyncError("Unknown email(s): " + ", ".join(unknown))
+
+        cur.execute("""
+            WITH wanted AS (
+                SELECT user_id FROM users WHERE email = ANY(%(emails)s)
+            ),
+            removed AS (
+                DELETE FROM team_members tm
+                WHERE tm.team_id = %(team_id)s
+                  AND tm.user_id NOT IN (SELECT user_id FROM wanted)
+                RETURNING tm.user_id
+            ),
+            added AS (
+                INSERT INTO team_members (team_id, user_id)
+                SELECT %(team_id)s, w.user_id FROM wanted w
+                ON CONFLICT DO NOTHING
+                RETURNING user_id
+            )
+            SELECT (SELECT COUNT(*) FROM added), (SELECT COUNT(*) FROM removed);
+        """, {"emails": emails, "team_id": team_id})
+        added, removed = cur.fetchone()
+        if added or removed:
+            publish(cur, "team", [team_id])
+        conn.commit()
+        return added, removed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
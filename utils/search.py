@@ -0,0 +1,67 @@
+from utils.pagination import keyset_paginate
+
+# Comment matches count for less than matches in the task itself
+COMMENT_RANK_WEIGHT = 0.5
+
+# Tasks of the caller's teams whose title/description or comments match the query,
+# best match first. Task and comment hits are found through their GIN indexes,
+# then merged per task.
+SEARCH_TASKS_QUERY = """
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', %s) AS query
+    ),
+    my_teams AS (
+        SELECT team_id FROM team_members WHERE user_id = %s
+        UNION
+        SELECT team_id FROM teams WHERE leader_id = %s
+    )
+    SELECT * FROM (
+        SELECT
+            t.task_id,
+            t.title,
+            t.description,
+            t.status,
+            t.priority,
+            t.due_date,
+            tm.name AS team_name,
+            au.username AS assigned_username,
+            hits.rank,
+            hits.comment_matches
+        FROM (
+            SELECT task_id, MAX(rank)::float8 AS rank, SUM(is_comment)::integer AS comment_matches
+            FROM (
+                SELECT t.task_id, ts_rank(t.search_vector, q.query) AS rank, 0 AS is_comment
+                FROM tasks t, q
+                WHERE t.search_vector @@ q.query
+                  AND t.team_id IN (SELECT team_id FROM my_teams)
+                UNION ALL
+                SELECT c.task_id, ts_rank(c.search_vector, q.query) * %s AS rank, 1 AS is_comment
+                FROM comments c
+                JOIN tasks t ON t.task_id = c.task_id, q
+                WHERE c.search_vector @@ q.query
+                  AND t.team_id IN (SELECT team_id FROM my_teams)
+            ) matches
+            GROUP BY task_id
+        ) hits
+        JOIN tasks t ON t.task_id = hits.task_id
+        LEFT JOIN teams tm ON t.team_id = tm.team_id
+        LEFT JOIN users au ON t.assigned_to = au.user_id
+    ) results
+    WHERE {keyset}
+"""
+
+
+def search_tasks(cur, user_id, text, page_size, after=None):
+    """
+    Full-text search over the tasks (and their comments) of the teams a user
+    leads or belongs to. Returns a KeysetPage ranked by relevance.
+    """
+    return keyset_paginate(
+        cur,
+        SEARCH_TASKS_QUERY,
+        (text, user_id, user_id, COMMENT_RANK_WEIGHT),
+        [("results.rank", "rank"), ("results.task_id", "task_id")],
+        page_size,
+        after,
+        descending=True,
+    )
@@ -0,0 +1,150 @@
+from datetime import date
+
+from psycopg2 import sql  # type: ignore
+from utils.task_import import TASK_PRIORITIES, TASK_STATUSES
+
+# ---------------------------------------------
+# --- Batch Task Updates ---
+# ---------------------------------------------
+# Applies the same changes to many tasks with one UPDATE. The permission check
+# is part of the statement's WHERE clause, so every task is checked on its own
+# and the ids that were not updated are reported back as denied.
+
+BATCH_MAX_TASKS = 500
+
+# Which tasks each role may change, and which fields it may change on them
+BATCH_PERMISSIONS = {
+    "TEAM_LEADER": (
+        "EXISTS (SELECT 1 FROM teams tm WHERE tm.team_id = t.team_id AND tm.leader_id = %s)",
+        ("status", "priority", "assigned_to", "due_date"),
+    ),
+    "MEMBER": (
+        "t.assigned_to = %s",
+        ("status",),
+    ),
+}
+
+
+class BatchUpdateError(Exception):
+    """Raised when a batch request is malformed; the message is shown to the user."""
+
+
+def parse_batch_request(data, role):
+    """Validates a batch payload; returns (task_ids, {field: value})."""
+    _, allowed_fields = BATCH_PERMISSIONS[role]
+
+    raw_ids = data.get("task_ids") or []
+    if not isinstance(raw_ids, list):
+        raise BatchUpdateError("task_ids must be a list.")
+    try:
+        task_ids = sorted({int(task_id) for task_id in raw_ids})
+    except (TypeError, ValueError):
+        raise BatchUpdateError("task_ids must be integers.")
+    if not task_ids:
+        raise BatchUpdateError("Select at least one task.")
+    if len(task_ids) > BATCH_MAX_TASKS:
+        raise BatchUpdateError(f"At most {BATCH_MAX_TASKS} tasks can be updated at once.")
+
+    changes = {}
+    for field in ("status", "priority", "assigned_to", "due_date"):
+        value = data.get(field)
+        if value in (None, ""):
+            continue
+        if field not in allowed_fields:
+            raise BatchUpdateError(f"You are not allowed to change {field}.")
+        changes[field] = str(value).strip()
+
+    if not changes:
+        raise BatchUpdateError("Nothing to change.")
+
+    if "status" in changes:
+        changes["status"] = changes["status"].upper()
+        if changes["status"] not in TASK_STATUSES:
+            raise BatchUpdateError("Invalid status.")
+    if "priority" in changes:
+        changes["priority"] = changes["priority"].upper()
+        if changes["priority"] not in TASK_PRIORITIES:
+            raise BatchUpdateError("Invalid priority.")
+    if "due_date" in changes:
+        try:
+            date.fromisoformat(changes["due_date"])
+        except ValueError:
+            raise BatchUpdateError("Invalid due date (expected YYYY-MM-DD).")
+
+    return task_ids, changes
+
+
+def batch_update_tasks(cur, user_id, role, task_ids, changes):
+    """
+    Updates every task in `task_ids` the user may change (`cur` is a RealDictCursor).
+    Tasks that already have the new values are left alone, so their versions do
+    not move. Returns (updated_ids, unchanged_ids, denied_ids, changed) where
+    changed maps each field to the ids whose value it changed; the caller commits.
+    """
+    permission, _ = BATCH_PERMISSIONS[role]
+
+    if "assigned_to" in changes:
+        cur.execute("SELECT user_id FROM users WHERE email = %s;", (changes["assigned_to"],))
+        assignee = cur.fetchone()
+        if assignee is None:
+            raise BatchUpdateError("Assigned user not found.")
+        assignee_id = assignee["user_id"]
+
+    # field -> new value as SQL; every field is also its column name
+    values, params = [], []
+    if "status" in changes:
+        values.append(("status", sql.SQL("%s::task_status")))
+        params.append(changes["status"])
+    if "priority" in changes:
+        values.append(("priority", sql.SQL("%s::task_priority")))
+        params.append(changes["priority"])
+    if "assigned_to" in changes:
+        values.append(("assigned_to", sql.SQL("%s")))
+        params.append(assignee_id)
+    if "due_date" in changes:
+        values.append(("due_date", sql.SQL("%s::date")))
+        params.append(changes["due_date"])
+    columns = [sql.Identifier(field) for field, _ in values]
+
+    cur.execute(
+        sql.SQL("""
+            WITH allowed AS (
+                SELECT t.task_id, {old_columns}
+                FROM tasks t
+                WHERE t.task_id = ANY(%s) AND {permission}
+                FOR UPDATE
+            ), changed AS (
+                UPDATE tasks t
+                SET {assignments}
+                FROM allowed old
+                WHERE t.task_id = old.task_id AND ({old_values}) IS DISTINCT FROM ({new_values})
+                RETURNING t.task_id, {changed_columns}
+            )
+            SELECT allowed.task_id, changed.task_id IS NOT NULL AS updated, {changed_aliases}
+            FROM allowed
+            LEFT JOIN changed ON changed.task_id = allowed.task_id;
+        """).format(
+            old_columns=sql.SQL(", ").join(sql.SQL("t.{}").format(column) for column in columns),
+            permission=sql.SQL(permission),
+            assignments=sql.SQL(", ").join(
+                sql.SQL("{} = {}").format(column, value) for column, (_, value) in zip(columns, values)
+            ),
+            old_values=sql.SQL(", ").join(sql.SQL("old.{}").format(column) for column in columns),
+            new_values=sql.SQL(", ").join(value for _, value in values),
+            changed_aliases=sql.SQL(", ").join(
+                sql.SQL("changed.{}").format(sql.Identifier(f"{field}_changed")) for field, _ in values
+            ),
+            changed_columns=sql.SQL(", ").join(
+                sql.SQL("t.{column} IS DISTINCT FROM old.{column} AS {alias}").format(
+                    column=column, alias=sql.Identifier(f"{field}_changed"))
+                for column, (field, _) in zip(columns, values)
+            ),
+        ),
+        [task_ids, user_id] + params + params
+    )
+    rows = cur.fetchall()
+    updated = sorted(row["task_id"] for row in rows if row["updated"])
+    unchanged = sorted(row["task_id"] for row in rows if not row["updated"])
+    denied = sorted(set(task_ids) - {row["task_id"] for row in rows})
+    changed = {field: sorted(row["task_id"] for row in rows if row[f"{field}_changed"]) for field, _ in values}
+    return updated, unchanged, denied, changed
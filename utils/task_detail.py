@@ -0,0 +1,56 @@
+from psycopg2.extras import RealDictCursor  # type: ignore
+
+# Task, its comments (newest first) and each comment's attachments in one round trip.
+# comments -> [{comment_id, content, created_at, username, attachments: [{attachment_id, file_name, file_path, content_hash, content_type}]}]
+TASK_DETAIL_QUERY = """
+    SELECT
+        t.task_id,
+        t.title,
+        t.description,
+        t.status,
+        t.priority,
+        t.due_date,
+        t.created_at,
+        t.team_id,
+        cu.username AS created_by_username,
+        au.username AS assigned_to_username,
+        COALESCE((
+            SELECT json_agg(json_build_object(
+                'comment_id', c.comment_id,
+                'content', c.content,
+                'created_at', c.created_at,
+                'username', u.username,
+                'attachments', COALESCE((
+                    SELECT json_agg(json_build_object(
+                        'attachment_id', a.attachment_id,
+                        'file_name', a.file_name,
+                        'file_path', a.file_path,
+                        'content_hash', a.content_hash,
+                        'content_type', a.content_type
+                    ) ORDER BY a.attachment_id)
+                    FROM attachments a
+                    WHERE a.task_id = t.task_id AND a.comment_id = c.comment_id
+                ), '[]'::json)
+            ) ORDER BY c.created_at DESC)
+            FROM comments c
+            JOIN users u ON c.author_id = u.user_id
+            WHERE c.task_id = t.task_id
+        ), '[]'::json) AS comments
+    FROM tasks t
+    LEFT JOIN users cu ON t.created_by = cu.user_id
+    LEFT JOIN users au ON t.assigned_to = au.user_id
+    WHERE t.task_id = %s;
+"""
+
+
+def load_task_detail(conn, task_id):
+    """
+    Loads a task with its comments and their attachments already nested.
+    Returns the task dict (with a "comments" list) or None if it does not exist.
+    """
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute(TASK_DETAIL_QUERY, (task_id,))
+        return cur.fetchone()
+    finally:
+        cur.close()
@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+from datetime import date
+
+from config import IMPORT_MAX_ROWS
+
+# ---------------------------------------------
+# --- Bulk Task Import ---
+# ---------------------------------------------
+# A CSV (header row) or JSON (list of objects) file with the columns
+#   title, description, assigned_to (email), priority, status, due_date (YYYY-MM-DD)
+# is validated row by row, COPY'd into a temporary staging table and inserted
+# with a single INSERT ... SELECT that resolves every assignee email in one join.
+# The import is all-or-nothing: any invalid row aborts it, so a fixed file can
+# be re-submitted without creating duplicates.
+
+IMPORT_COLUMNS = ("title", "description", "assigned_to", "priority", "status", "due_date")
+TASK_PRIORITIES = ("LOW", "MEDIUM", "HIGH")
+TASK_STATUSES = ("TODO", "IN_PROGRESS", "DONE")
+TITLE_MAX_LENGTH = 200
+
+
+class ImportFileError(Exception):
+    """Raised when the uploaded file cannot be read at all."""
+
+
+def parse_import_file(filename, data):
+    """Returns [(row_number, {column: text}), ...] from CSV or JSON bytes."""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFileError("The file must be UTF-8 encoded.")
+
+    if filename.lower().endswith(".json"):
+        try:
+            records = json.loads(text)
+        except ValueError as e:
+            raise ImportFileError(f"Invalid JSON: {e}")
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise ImportFileError("The JSON file must contain a list of objects.")
+        first_row = 1
+    elif filename.lower().endswith(".csv"):
+        reader = csv.DictReader(io.StringIO(text))
+        missing = {"title"} - set(reader.fieldnames or [])
+        if missing:
+            raise ImportFileError("The CSV header must include a 'title' column.")
+        records = list(reader)
+        first_row = 2                   # row 1 is the header
+    else:
+        raise ImportFileError("Only .csv and .json files can be imported.")
+
+    if len(records) > IMPORT_MAX_ROWS:
+        raise ImportFileError(f"At most {IMPORT_MAX_ROWS} tasks can be imported at once.")
+
+    rows = []
+    for offset, record in enumerate(records):
+        values = {}
+        for column in IMPORT_COLUMNS:
+            value = record.get(column)
+            values[column] = "" if value is None else str(value).strip()
+        rows.append((first_row + offset, values))
+    return rows
+
+
+def validate_row(values):
+    """Normalizes one row in place and returns a list of error messages."""
+    errors = []
+
+    if not values["title"]:
+        errors.append("title is required")
+    elif len(values["title"]) > TITLE_MAX_LENGTH:
+        errors.append(f"title is longer than {TITLE_MAX_LENGTH} characters")
+
+    values["priority"] = values["priority"].upper() or "MEDIUM"
+    if values["priority"] not in TASK_PRIORITIES:
+        errors.append(f"unknown priority '{values['priority']}'")
+
+    values["status"] = values["status"].upper().replace(" ", "_") or "TODO"
+    if values["status"] not in TASK_STATUSES:
+        errors.append(f"unknown status '{values['status']}'")
+
+    if values["due_date"]:
+        try:
+            date.fromisoformat(values["due_date"])
+        except ValueError:
+            errors.append(f"invalid due_date '{values['due_date']}' (expected YYYY-MM-DD)")
+
+    return errors
+
+
+def _copy_buffer(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row_number, values in rows:
+        writer.writerow([row_number] + [values[c] for c in IMPORT_COLUMNS])
+    buffer.seek(0)
+    return buffer
+
+
+def import_tasks(conn, team_id, created_by, rows):
+    """
+    Imports parsed rows into `team_id` in one transaction.
+    Returns (imported_count, [(row_number, message), ...]); nothing is
+    inserted when the error list is not empty.
+    """
+    errors = []
+    for row_number, values in rows:
+        for message in validate_row(values):
+            errors.append((row_number, message))
+    if errors or not rows:
+        return 0, errors
+
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            CREATE TEMP TABLE task_import_staging (
+                row_number integer,
+                title text,
+                description text,
+                assigned_to text,
+                priority text,
+                status text,
+                due_date text
+            ) ON COMMIT DROP;
+        """)
+        cur.copy_expert(
+            "COPY task_import_staging (row_number, title, description, assigned_to, priority, status, due_date) "
+            "FROM STDIN WITH (FORMAT csv)",
+            _copy_buffer(rows)
+        )
+
+        # Every assignee email resolved in a single query
+        cur.execute("""
+            SELECT s.row_number, s.assigned_to
+            FROM task_import_staging s
+            LEFT JOIN users u ON u.email = s.assigned_to
+            WHERE s.assigned_to <> '' AND u.user_id IS NULL
+            ORDER BY s.row_number;
+        """)
+        errors = [(row_number, f"assigned user '{email}' not found") for row_number, email in cur.fetchall()]
+        if errors:
+            conn.rollback()
+            return 0, errors
+
+        cur.execute("""
+            INSERT INTO tasks (title, description, created_by, assigned_to, team_id, status, priority, due_date, created_at)
+            SELECT
+                s.title,
+                NULLIF(s.description, ''),
+                %s,
+                u.user_id,
+                %s,
+                s.status::task_status,
+                s.priority::task_priority,
+                NULLIF(s.due_date, '')::date,
+                NOW()
+            FROM task_import_staging s
+            LEFT JOIN users u ON u.email = s.assigned_to
+            ORDER BY s.row_number;
+        """, (created_by, team_id))
+        imported = cur.rowcount
+        conn.commit()
+        return imported, []
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
@@ -0,0 +1,75 @@
+from psycopg2.extras import RealDictCursor  # type: ignore
+from config import TEAM_CACHE_SIZE, TEAM_CACHE_TTL
+from utils.cache import LRUCache
+from utils.invalidation import subscribe
+
+# Roster of one team, as cached below
+TEAM_MEMBERS_QUERY = """
+    SELECT u.user_id, u.username, u.email, u.role, u.status
+    FROM team_members tm
+    JOIN users u ON tm.user_id = u.user_id
+    WHERE tm.team_id = %s
+    ORDER BY u.username;
+"""
+
+# team_id -> {"team": {team_id, name, description, leader_id, leader_name},
+#             "members": [{user_id, username, email, role, status}, ...]}
+# Cached values are shared between requests and must not be mutated.
+_team_cache = LRUCache(TEAM_CACHE_SIZE, ttl=TEAM_CACHE_TTL)
+
+
+def load_team(conn, team_id):
+    """Returns the cached header and roster of a team, querying on a miss; None if it does not exist."""
+    cached = _team_cache.get(team_id)
+    if cached is not None:
+        return cached
+
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            SELECT
+                t.team_id,
+                t.name,
+                t.description,
+                t.leader_id,
+                u.username AS leader_name
+            FROM teams t
+            LEFT JOIN users u ON t.leader_id = u.user_id
+            WHERE t.team_id = %s;
+        """, (team_id,))
+        team = cur.fetchone()
+        if team is None:
+            return None
+
+        cur.execute(TEAM_MEMBERS_QUERY, (team_id,))
+        members = cur.fetchall()
+    finally:
+        cur.close()
+
+    cached = {"team": team, "members": members}
+    _team_cache.set(team_id, cached)
+    return cached
+
+
+def forget_team(team_id):
+    """Drops a cached team (membership or team row changed)."""
+    _team_cache.delete(team_id)
+
+
+def user_team_ids(cur, user_ids):
+    """Returns the teams the users lead or belong to (`cur` is a RealDictCursor)."""
+    cur.execute("""
+        SELECT team_id FROM team_members WHERE user_id = ANY(%s)
+        UNION
+        SELECT team_id FROM teams WHERE leader_id = ANY(%s);
+    """, (list(user_ids), list(user_ids)))
+    return [row["team_id"] for row in cur.fetchall()]
+
+
+def team_cache_stats():
+    """Returns size and hit/miss counters of this worker's team cache."""
+    return _team_cache.stats()
+
+
+# Other workers evict their copies through the invalidation bus
+subscribe("team", lambda team_ids: [forget_team(team_id) for team_id in team_ids], _team_cache.clear)